@@ -7,19 +7,25 @@ Same behavior/format as your USB tool, plus:
 - BLE preflight: performs a quick bluetoothctl connect -> waits for ServicesResolved: yes -> disconnect,
   to avoid "Service Discovery has not been performed yet" errors.
 - Identical NDJSON structure & directory layout for USB and BLE.
+- Optional LOG_FORMAT = "msgpack" archive; `--decode <file>.msgpack` prints it back as NDJSON.
 """
 
 import base64
+import io
 import json
 import os
+import queue
+import select
 import signal
+import struct
 import sys
 import threading
 import time
 import subprocess
-from datetime import datetime, timezone
+from datetime import datetime, timedelta, timezone
+from functools import lru_cache
 from pathlib import Path
-from typing import Any, Dict, Optional, Tuple
+from typing import Any, Dict, FrozenSet, Iterator, Optional, Tuple
 
 # =========================
 # CONFIG — EDIT THESE
@@ -52,8 +58,11 @@ LOG_ROOT = "/mnt/external_4tb/2025_meshtastic_burn/meshtastic_logs"
 USE_UTC = True
 VERBOSE = True
 PRINT_JSON = True          # mirror NDJSON lines to stdout
-FLUSH_EVERY_LINE = True
+LOG_FORMAT = "ndjson"      # "ndjson" or "msgpack" (compact archive; needs: pip install msgpack)
+FSYNC_EVERY_SEC = 1.0      # batch fsync cadence; 0 = fsync after every write
+EVENT_QUEUE_MAX = 10000    # events buffered ahead of the disk writer; overflow is dropped
 SNAPSHOT_EVERY_MIN = 30
+SNAPSHOT_FULL_EVERY = 2    # every Nth periodic snapshot is full; the others log only changed nodes
 
 # Echo controls (same behavior as your USB tool)
 ECHO_ENABLED = True
@@ -74,91 +83,389 @@ except Exception as e:
     print("ERROR: Install dependencies: pipx install meshtastic  (or pip install meshtastic pypubsub)", file=sys.stderr)
     raise
 
+# orjson is optional: ~5-10x faster than stdlib json and emits bytes directly.
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+def _json_default(obj: Any) -> Any:
+    # raw bytes are only left in events for LOG_FORMAT = "msgpack" (see safe_to_dict);
+    # JSON output gets the same wrapper the NDJSON log uses
+    if isinstance(obj, (bytes, bytearray)):
+        return {"__bytes_b64": base64.b64encode(obj).decode("ascii")}
+    raise TypeError(f"{type(obj).__name__} is not JSON serializable")
+
+def dumps_bytes(obj: Any) -> bytes:
+    if orjson is not None:
+        try:
+            return orjson.dumps(obj, default=_json_default)
+        except TypeError:
+            pass   # e.g. ints beyond 64 bits, which stdlib json still handles
+    return json.dumps(obj, ensure_ascii=False, default=_json_default).encode("utf-8")
+
+# Meshtastic packets carry protobuf messages (e.g. packet["raw"]); protobuf ships with meshtastic.
+try:
+    from google.protobuf.json_format import MessageToDict
+    from google.protobuf.message import Message as ProtoMessage
+except ImportError:
+    MessageToDict = None
+    ProtoMessage = ()   # isinstance(x, ()) is always False
+
+# msgpack is only needed for LOG_FORMAT = "msgpack" (and --decode).
+try:
+    import msgpack
+except ImportError:
+    msgpack = None
+
 stop_event = threading.Event()
 iface = None
-ALLOW_SET = set(s.strip().upper() for s in (ECHO_ALLOW or []) if s.strip())
+ALLOW_SET: FrozenSet[str] = frozenset(s.strip().upper() for s in (ECHO_ALLOW or []) if s.strip())
+
+# (epoch second, "YYYY-MM-DDTHH:MM:SS", "+HH:MM", hour bucket); swapped as one tuple
+_ts_cache: Tuple[int, str, str, str] = (-1, "", "", "")
 
 def now_ts() -> Tuple[str, str]:
-    if USE_UTC:
-        dt = datetime.now(timezone.utc)
-    else:
-        dt = datetime.now().astimezone()
-    return dt.isoformat(), dt.strftime("%Y-%m-%d_%H")
+    """(ISO timestamp with ms, hour bucket); datetime work happens once per wall-clock second."""
+    global _ts_cache
+    t = time.time()
+    sec = int(t)
+    cache = _ts_cache
+    if cache[0] != sec:
+        if USE_UTC:
+            dt = datetime.fromtimestamp(sec, timezone.utc)
+        else:
+            dt = datetime.fromtimestamp(sec).astimezone()
+        iso = dt.isoformat()
+        cache = _ts_cache = (sec, iso[:19], iso[19:], dt.strftime("%Y-%m-%d_%H"))
+    return f"{cache[1]}.{int((t - sec) * 1000):03d}{cache[2]}", cache[3]
+
+class _SanitizeTable(dict):
+    """str.translate table: keep alnum + -_.+!@:, drop the rest (memoized per codepoint)."""
+    def __missing__(self, cp: int) -> Optional[int]:
+        ch = chr(cp)
+        keep = cp if (ch.isalnum() or ch in "-_.+!@:") else None
+        self[cp] = keep
+        return keep
+
+_SANITIZE_TABLE = _SanitizeTable()
+for _cp in range(256):   # prefill Latin-1; anything else is filled in on first sight
+    _SANITIZE_TABLE[_cp]
 
 def sanitize(s: str) -> str:
-    return "".join(c for c in s if (c.isalnum() or c in ("-", "_", ".", "+", "!", "@", ":")))
-
-def safe_to_dict(obj: Any) -> Any:
-    if obj is None or isinstance(obj, (str, int, float, bool)):
-        return obj
-    if isinstance(obj, dict):
-        return {str(k): safe_to_dict(v) for k, v in obj.items()}
-    if isinstance(obj, (list, tuple)):
-        return [safe_to_dict(x) for x in obj]
-    if isinstance(obj, (bytes, bytearray)):
-        return {"__bytes_b64": base64.b64encode(bytes(obj)).decode("ascii")}
-    to_dict = getattr(obj, "toDict", None)
-    if callable(to_dict):
-        try:
-            return safe_to_dict(to_dict())
-        except Exception:
-            pass
-    d = getattr(obj, "__dict__", None)
-    if isinstance(d, dict):
-        try:
-            return safe_to_dict(d)
-        except Exception:
-            pass
+    return s.translate(_SANITIZE_TABLE)
+
+_SCALARS = (str, int, float, bool)
+_MAX_DEPTH = 100   # anything nested deeper is stringified instead of walked
+_DONE = object()   # stack marker: a container's children have all been processed
+
+def safe_to_dict(obj: Any, raw_bytes: bool = False) -> Any:
+    """JSON-safe copy of obj. Protobuf messages go through MessageToDict (C-backed);
+    everything else is walked with an explicit stack instead of recursion.
+    A container that (indirectly) contains itself is stringified at the repeat.
+    bytes become {"__bytes_b64": ...}, or stay bytes with raw_bytes (msgpack bin)."""
+    root = [None]
+    stack = [(root, 0, obj, 0)]   # (parent container, slot, value, depth)
+    open_ids = set()              # ids of the containers on the current path; each is
+                                  # kept alive by its _DONE entry, so an id can't be reused
+    while stack:
+        parent, slot, val, depth = stack.pop()
+        if parent is _DONE:
+            open_ids.discard(id(slot))
+        elif val is None or isinstance(val, _SCALARS):
+            parent[slot] = val
+        elif isinstance(val, (bytes, bytearray)):
+            if raw_bytes:
+                parent[slot] = bytes(val)
+            else:
+                parent[slot] = {"__bytes_b64": base64.b64encode(bytes(val)).decode("ascii")}
+        elif depth >= _MAX_DEPTH:
+            parent[slot] = _to_str(val)
+        elif isinstance(val, (dict, list, tuple)):
+            if id(val) in open_ids:
+                parent[slot] = _to_str(val)
+                continue
+            open_ids.add(id(val))
+            stack.append((_DONE, val, None, depth))
+            if isinstance(val, dict):
+                out = parent[slot] = {}
+                for k, v in val.items():
+                    k = str(k)
+                    out[k] = None   # reserve the slot so key order survives LIFO processing
+                    stack.append((out, k, v, depth + 1))
+            else:
+                out = parent[slot] = [None] * len(val)
+                stack.extend((out, i, v, depth + 1) for i, v in enumerate(val))
+        elif isinstance(val, ProtoMessage):
+            try:
+                parent[slot] = MessageToDict(val, preserving_proto_field_name=True)
+            except Exception:
+                parent[slot] = _to_str(val)
+        else:
+            parent[slot] = _to_str(val)
+            to_dict = getattr(val, "toDict", None)
+            if callable(to_dict):
+                try:
+                    stack.append((parent, slot, to_dict(), depth + 1))
+                    continue
+                except Exception:
+                    pass
+            d = getattr(val, "__dict__", None)
+            if isinstance(d, dict):
+                stack.append((parent, slot, d, depth + 1))
+    return root[0]
+
+def _to_str(obj: Any) -> str:
     try:
         return str(obj)
     except Exception:
         return repr(obj)
 
+WRITE_BUFFER_BYTES = 64 * 1024
+PREOPEN_SEC = 5    # open the next hour's log this many seconds before the boundary
+
+def _local_dt(t: float) -> datetime:
+    return datetime.fromtimestamp(t, timezone.utc) if USE_UTC else datetime.fromtimestamp(t).astimezone()
+
+def hour_bucket_at(t: float) -> str:
+    return _local_dt(t).strftime("%Y-%m-%d_%H")
+
+def next_hour_boundary() -> float:
+    """Epoch seconds of the next top-of-hour in the logging timezone."""
+    dt = _local_dt(time.time()).replace(minute=0, second=0, microsecond=0)
+    return (dt + timedelta(hours=1)).timestamp()
+
+def fsync_dir(folder: Path):
+    """Persist a new directory entry (fsyncing the file alone does not cover its name)."""
+    try:
+        fd = os.open(folder, os.O_RDONLY | getattr(os, "O_DIRECTORY", 0))
+    except OSError:
+        return
+    try:
+        os.fsync(fd)
+    except OSError:
+        pass
+    finally:
+        os.close(fd)
+_STOP = object()   # writer-queue sentinel
+_MSGPACK_LEN = struct.Struct(">I")   # msgpack archive framing: u32 length, then the record
+LOG_EXTENSIONS = {"ndjson": ".ndjson", "msgpack": ".msgpack"}
+
+def read_msgpack_log(path: str) -> Iterator[Dict[str, Any]]:
+    """Yield the events of a LOG_FORMAT="msgpack" archive; stops quietly at a torn tail."""
+    with open(path, "rb") as fp:
+        while True:
+            hdr = fp.read(_MSGPACK_LEN.size)
+            if len(hdr) < _MSGPACK_LEN.size:
+                return
+            (n,) = _MSGPACK_LEN.unpack(hdr)
+            rec = fp.read(n)
+            if len(rec) < n:
+                return
+            yield msgpack.unpackb(rec, raw=False)
+
 class HourlyNDJSONWriter:
-    def __init__(self, root: Path, label: str):
+    """Hourly log: NDJSON, or length-prefixed msgpack with LOG_FORMAT="msgpack".
+    write() only enqueues; a single writer thread owns the file."""
+
+    def __init__(self, root: Path, label: str, flush_interval_sec: float = FSYNC_EVERY_SEC,
+                 max_queue: int = EVENT_QUEUE_MAX, batch_max: int = 256,
+                 batch_window_sec: float = 0.01, fmt: str = LOG_FORMAT):
+        if fmt not in LOG_EXTENSIONS:
+            raise ValueError(f"LOG_FORMAT must be one of {sorted(LOG_EXTENSIONS)}, not {fmt!r}")
+        if fmt == "msgpack" and msgpack is None:
+            raise RuntimeError('LOG_FORMAT = "msgpack" needs: pip install msgpack')
+        self.fmt = fmt
         self.root = root
         self.label = sanitize(label) if label else "meshtastic"
         self.cur_hour = None
         self.fp = None
-        self.lock = threading.Lock()
+        self.lock = threading.Lock()   # guards the pre-opened file handoff and close; never taken on enqueue
+        self.dirty = False
+        self.flush_interval_sec = flush_interval_sec
+        self.batch_max = batch_max
+        self.batch_window_sec = batch_window_sec
+        self.q: "queue.Queue[Any]" = queue.Queue(maxsize=max_queue)
+        self.dropped = 0
+        self._next = None          # (hour_bucket, fp) opened ahead of the hour boundary
+        self._retiring = []        # threads fsync+closing rotated-out files
+        self._closed = threading.Event()
         self.root.mkdir(parents=True, exist_ok=True)
+        self._thread = threading.Thread(target=self._run, name="ndjson-writer", daemon=True)
+        self._thread.start()
+        threading.Thread(target=self._preopen_loop, name="ndjson-preopen", daemon=True).start()
+
+    def _sync(self):
+        """flush + fsync the current file."""
+        try:
+            self.fp.flush(); os.fsync(self.fp.fileno())
+        except Exception:
+            pass
+        self.dirty = False
 
     def _open_for_hour(self, hour_bucket: str):
         folder = self.root / self.label
         folder.mkdir(parents=True, exist_ok=True)
-        fname = f"{self.label}_{hour_bucket}.ndjson"
+        fname = f"{self.label}_{hour_bucket}{LOG_EXTENSIONS[self.fmt]}"
         path = folder / fname
-        if VERBOSE and (not path.exists()):
+        created = not path.exists()
+        if VERBOSE and created:
             print(f"[INFO] Logging to {path} ...", file=sys.stderr)
-        self.fp = open(path, "a", buffering=1, encoding="utf-8")
-        os.fsync(self.fp.fileno())
+        # Coalesce small NDJSON records into ~64 KiB write(2) calls; _sync() drains it.
+        fp = io.BufferedWriter(open(path, "ab", buffering=0), buffer_size=WRITE_BUFFER_BYTES)
+        if created:
+            fsync_dir(folder)
+        return fp
+
+    def _preopen_loop(self):
+        # Open the next hour's file a few seconds early so rotation is just a swap.
+        while True:
+            boundary = next_hour_boundary()
+            if self._closed.wait(max(0.0, boundary - PREOPEN_SEC - time.time())):
+                return
+            bucket = hour_bucket_at(boundary)
+            try:
+                fp = self._open_for_hour(bucket)
+            except Exception as e:
+                print(f"[WARN] Could not pre-open log for {bucket}: {e}", file=sys.stderr)
+            else:
+                with self.lock:
+                    stale, self._next = self._next, (bucket, fp)
+                if stale:
+                    self._discard(stale[1])
+            if self._closed.wait(max(0.0, boundary - time.time()) + 1):
+                return
+
+    @staticmethod
+    def _discard(fp):
+        """Close a pre-opened file that was never written; don't leave it behind if empty."""
+        try:
+            fp.close()
+            if os.path.getsize(fp.name) == 0:
+                os.remove(fp.name)
+        except Exception:
+            pass
+
+    @staticmethod
+    def _retire(fp):
+        try:
+            fp.flush(); os.fsync(fp.fileno()); fp.close()
+        except Exception:
+            pass
 
     def write(self, event: Dict[str, Any]):
-        _, hour_bucket = now_ts()
-        line = json.dumps(event, ensure_ascii=False)
-        with self.lock:
-            if self.cur_hour != hour_bucket or self.fp is None:
-                if self.fp:
-                    try:
-                        self.fp.flush(); os.fsync(self.fp.fileno()); self.fp.close()
-                    except Exception:
-                        pass
-                self.cur_hour = hour_bucket
-                self._open_for_hour(hour_bucket)
-            self.fp.write(line + "\n")
-            if FLUSH_EVERY_LINE:
+        try:
+            self.q.put_nowait(event)
+        except queue.Full:
+            self.dropped += 1
+            if VERBOSE and self.dropped % 1000 == 1:
+                print(f"[WARN] Writer queue full; dropped {self.dropped} event(s) so far.", file=sys.stderr)
+
+    def write_encoded(self, event: Dict[str, Any]):
+        """Like write(), but serialize on the calling thread. Meant for big events
+        (node snapshots) so their encoding never stalls the writer thread."""
+        try:
+            encoded = self._encode(event)
+        except Exception as e:
+            print(f"[WARN] Could not serialize {event.get('type')!r} event: {e}", file=sys.stderr)
+            return
+        self.write(encoded)
+
+    def _encode(self, ev: Dict[str, Any]) -> Tuple[bytes, Optional[bytes]]:
+        # (file record, newline-terminated JSON line for the stdout mirror)
+        if self.fmt == "msgpack":
+            rec = msgpack.packb(ev, use_bin_type=True)
+            return _MSGPACK_LEN.pack(len(rec)) + rec, dumps_bytes(ev) + b"\n" if PRINT_JSON else None
+        line = dumps_bytes(ev) + b"\n"
+        return line, line
+
+    def _write_batch(self, events: list):
+        records, lines = [], []   # file records; JSON lines for the stdout mirror
+        for ev in events:
+            if isinstance(ev, tuple):   # already encoded by write_encoded()
+                rec, line = ev
+            else:
                 try:
-                    self.fp.flush(); os.fsync(self.fp.fileno())
-                except Exception:
-                    pass
-        if PRINT_JSON:
-            print(line, flush=True)
+                    rec, line = self._encode(ev)
+                except Exception as e:
+                    print(f"[WARN] Could not serialize {ev.get('type')!r} event: {e}", file=sys.stderr)
+                    continue
+            records.append(rec)
+            if line is not None:
+                lines.append(line)
+        _, hour_bucket = now_ts()
+        if self.cur_hour != hour_bucket or self.fp is None:
+            with self.lock:
+                old, nxt, self._next = self.fp, self._next, None
+            if nxt and nxt[0] == hour_bucket:
+                self.fp = nxt[1]
+            else:
+                if nxt:
+                    self._discard(nxt[1])
+                self.fp = self._open_for_hour(hour_bucket)
+            self.cur_hour = hour_bucket
+            if old:
+                # the outgoing file's fsync+close runs off the writer thread
+                t = threading.Thread(target=self._retire, args=(old,), daemon=True)
+                t.start()
+                self._retiring = [r for r in self._retiring if r.is_alive()] + [t]
+        self.fp.writelines(records)
+        self.dirty = True
+        if PRINT_JSON and lines:
+            # one writelines + one flush per batch; the writer thread is the only stdout JSON producer
+            out = sys.stdout.buffer
+            out.writelines(lines)
+            out.flush()
+
+    def _run(self):
+        # Collect up to batch_max events, waiting at most batch_window_sec after the first
+        # one; fsync at most once per flush_interval_sec.
+        last_sync = time.monotonic()
+        stop = False
+        while not stop:
+            timeout = None
+            if self.dirty:
+                timeout = max(0.0, last_sync + self.flush_interval_sec - time.monotonic())
+            batch = []
+            try:
+                batch.append(self.q.get(timeout=timeout))
+                deadline = time.monotonic() + self.batch_window_sec
+                while len(batch) < self.batch_max and batch[-1] is not _STOP:
+                    wait = deadline - time.monotonic()
+                    batch.append(self.q.get(timeout=wait) if wait > 0 else self.q.get_nowait())
+            except queue.Empty:
+                pass
+            if _STOP in batch:
+                stop = True
+                batch = batch[:batch.index(_STOP)]
+            try:
+                if batch:
+                    self._write_batch(batch)
+                if self.dirty and (stop or time.monotonic() - last_sync >= self.flush_interval_sec):
+                    self._sync()
+                    last_sync = time.monotonic()
+            except Exception as e:
+                print(f"[WARN] Log writer error: {e}", file=sys.stderr)
 
     def close(self):
+        self._closed.set()
+        if self._thread.is_alive():
+            try:
+                self.q.put(_STOP, timeout=5)
+            except queue.Full:
+                pass
+            self._thread.join(timeout=10)
+        for t in self._retiring:
+            t.join(timeout=10)
         with self.lock:
+            if self._next:
+                self._discard(self._next[1])
+                self._next = None
             if self.fp:
+                if self.dirty:
+                    self._sync()
                 try:
-                    self.fp.flush(); os.fsync(self.fp.fileno()); self.fp.close()
+                    self.fp.close()
                 except Exception:
                     pass
                 self.fp = None
@@ -194,140 +501,235 @@ def get_my_ids(i) -> Dict[str, Any]:
             out["my_id_str"] = str(cand)
     except Exception:
         pass
+    # normalized once here so the per-packet path never has to .upper() our own ID
+    out["_my_id_upper"] = out["my_id_str"].upper() if out["my_id_str"] else None
     return out
 
-def extract_ids(packet: Dict[str, Any]) -> Tuple[Optional[str], Optional[str]]:
-    from_id = packet.get("fromId") or packet.get("from") or packet.get("from_id")
-    to_id = packet.get("toId") or packet.get("to") or packet.get("to_id")
-    if not from_id and isinstance(packet.get("rx"), dict):
-        from_id = packet["rx"].get("fromId") or packet["rx"].get("from")
-    if not to_id and isinstance(packet.get("rx"), dict):
-        to_id = packet["rx"].get("toId") or packet["rx"].get("to")
-    return (str(from_id) if from_id is not None else None,
-            str(to_id) if to_id is not None else None)
-
-def is_text_message(packet: Dict[str, Any]) -> Tuple[bool, Optional[str]]:
-    dec = packet.get("decoded") or {}
+@lru_cache(maxsize=1024)
+def normalize_id(node_id: str) -> str:
+    """Upper-cased node id, memoized per raw string; a mesh has few distinct ids,
+    so the per-packet checks skip the .upper() copy."""
+    return node_id.upper()
+
+def sender_allowed(from_id: str) -> bool:
+    """ECHO_ALLOW check (case-insensitive)."""
+    return not ALLOW_SET or normalize_id(from_id) in ALLOW_SET
+
+def is_text_portnum(pn: Any) -> bool:
+    """True only for TEXT_MESSAGE_APP (string or enum int=1)."""
+    if isinstance(pn, str):
+        return pn.upper() == "TEXT_MESSAGE_APP"
+    return isinstance(pn, int) and pn == 1
+
+def attach_payload_text(pkt: Dict[str, Any], packet: Any):
+    """Give TEXT_MESSAGE_APP packets that only have raw payload bytes a decoded "text",
+    taken from the original bytes rather than base64-decoding the logged copy."""
+    raw_dec = packet.get("decoded") if isinstance(packet, dict) else None
+    if not isinstance(raw_dec, dict) or raw_dec.get("text"):
+        return
+    payload = raw_dec.get("payload")
+    if isinstance(payload, (bytes, bytearray)) and is_text_portnum(raw_dec.get("portnum", raw_dec.get("payloadVariant"))):
+        pkt["decoded"]["text"] = bytes(payload).decode("utf-8", errors="ignore")
+
+def classify_packet(pkt: Dict[str, Any], my_ids: Dict[str, Any],
+                    text_app_only: bool = ECHO_TEXT_APP_ONLY
+                    ) -> Tuple[bool, Optional[str], Optional[str], Optional[str], bool]:
+    """Single pass over a converted packet -> (is_text_app, text, from_id, to_id, is_dm).
+
+    Returns early with text=None as soon as the packet cannot be an echo candidate.
+    """
+    dec = pkt.get("decoded") or {}
+    text_app = is_text_portnum(dec.get("portnum", dec.get("payloadVariant")))
+    if text_app_only and not text_app:
+        return (False, None, None, None, False)
+
+    # text-app payloads already carry "text" (see attach_payload_text); the base64 path
+    # only remains for non-text apps when ECHO_TEXT_APP_ONLY is off
     txt = dec.get("text") or dec.get("payload") or None
-    if isinstance(txt, dict) and "__bytes_b64" in txt:
+    if isinstance(txt, bytes):   # raw_bytes events (LOG_FORMAT = "msgpack")
+        txt = txt.decode("utf-8", errors="ignore")
+    elif isinstance(txt, dict) and "__bytes_b64" in txt:
         try:
-            raw = base64.b64decode(txt["__bytes_b64"])
-            txt = raw.decode("utf-8", errors="ignore")
+            txt = base64.b64decode(txt["__bytes_b64"]).decode("utf-8", errors="ignore")
         except Exception:
-            return (False, None)
-    if txt and isinstance(txt, str):
-        return (True, txt)
-    for k in ("message", "data"):
-        v = dec.get(k)
-        if isinstance(v, str) and v:
-            return (True, v)
-    return (False, None)
-
-def is_text_app(decoded: Dict[str, Any]) -> bool:
-    pn = decoded.get("portnum", decoded.get("payloadVariant"))
-    if isinstance(pn, str):
-        return pn.upper() == "TEXT_MESSAGE_APP"
-    if isinstance(pn, int):
-        return pn == 1
-    return False
-
-def likely_direct_message(packet: Dict[str, Any], my_ids: Dict[str, Any]) -> bool:
-    dec = packet.get("decoded") or {}
-    if dec.get("isPrivate") is True or dec.get("dm") is True:
-        return True
-    _, to_id = extract_ids(packet)
-    my_str = my_ids.get("my_id_str")
-    if my_str and to_id and to_id.upper() == str(my_str).upper():
-        return True
-    my_num = my_ids.get("my_node_num")
-    if my_num is not None and (dec.get("destination") == my_num or packet.get("to") == my_num):
-        return True
-    return False
-
-def do_send_echo(i, dest_id: str, text: str):
+            return (text_app, None, None, None, False)
+    if not (txt and isinstance(txt, str)):
+        txt = None
+        for k in ("message", "data"):
+            v = dec.get(k)
+            if isinstance(v, str) and v:
+                txt = v
+                break
+    if not (txt and txt.strip()):
+        return (text_app, None, None, None, False)
+
+    from_id = pkt.get("fromId") or pkt.get("from") or pkt.get("from_id")
+    to_id = pkt.get("toId") or pkt.get("to") or pkt.get("to_id")
+    rx = pkt.get("rx")
+    if isinstance(rx, dict):
+        if not from_id:
+            from_id = rx.get("fromId") or rx.get("from")
+        if not to_id:
+            to_id = rx.get("toId") or rx.get("to")
+    from_id = str(from_id) if from_id is not None else None
+    to_id = str(to_id) if to_id is not None else None
+
+    is_dm = dec.get("isPrivate") is True or dec.get("dm") is True
+    if not is_dm:
+        my_upper = my_ids.get("_my_id_upper")
+        if my_upper and to_id and normalize_id(to_id) == my_upper:
+            is_dm = True
+        else:
+            my_num = my_ids.get("my_node_num")
+            is_dm = my_num is not None and (dec.get("destination") == my_num or pkt.get("to") == my_num)
+    return (text_app, txt, from_id, to_id, is_dm)
+
+def do_send_echo(i, dest_id: str, text: str) -> Optional[str]:
+    """Send the echo and return the text actually sent, or None if nothing went out."""
     if not (ECHO_ENABLED and ALLOW_SET):
-        return
+        return None
     if not dest_id or not text or not text.strip():
-        return
+        return None
+    out_text = f"{ECHO_PREFIX}{text}" if ECHO_PREFIX else text
     try:
-        out_text = f"{ECHO_PREFIX}{text}" if ECHO_PREFIX else text
         i.sendText(text=out_text, destinationId=dest_id, wantAck=False)
-        if VERBOSE:
-            print(f"[ECHO] -> {dest_id}: {out_text}", file=sys.stderr, flush=True)
     except Exception as e:
         print(f"[WARN] Echo send failed to {dest_id}: {e}", file=sys.stderr)
+        return None
+    if VERBOSE:
+        print(f"[ECHO] -> {dest_id}: {out_text}", file=sys.stderr, flush=True)
+    return out_text
 
 # ---------- SUBSCRIBERS ----------
-def topic_receive(packet=None, interface=None, **kwargs):
-    try:
-        pkt = safe_to_dict(packet)
-        WRITER.write({"type": "rx", "ts": now_ts()[0], "packet": pkt})
-
-        decoded = pkt.get("decoded") or {}
-        if ECHO_TEXT_APP_ONLY and not is_text_app(decoded):
-            return
-        is_text, text = is_text_message(pkt)
-        if not (is_text and text and text.strip()):
-            return
-
-        from_id, _to_id = extract_ids(pkt)
-        if not from_id or (ALLOW_SET and from_id.upper() not in ALLOW_SET):
-            return
-        if not likely_direct_message(pkt, MY_IDS):
-            return
-        myid = MY_IDS.get("my_id_str")
-        if myid and str(from_id).upper() == str(myid).upper():
-            return
+def make_topic_receive(writer: HourlyNDJSONWriter, my_ids: Dict[str, Any]):
+    """Build the 'meshtastic.receive' handler with every name it touches per packet
+    bound once as a closure local instead of a module-global lookup."""
+    write = writer.write
+    now = now_ts
+    to_dict = safe_to_dict
+    raw_bytes = writer.fmt == "msgpack"
+    attach_text = attach_payload_text
+    classify = classify_packet
+    send_echo = do_send_echo
+    allowed = sender_allowed
+    norm_id = normalize_id
+    my_upper = my_ids.get("_my_id_upper")
+    default_iface = iface
+
+    def topic_receive(packet=None, interface=None, **kwargs):
+        """Handler for 'meshtastic.receive'."""
+        try:
+            pkt = to_dict(packet, raw_bytes)
+            attach_text(pkt, packet)
+            write({"type": "rx", "ts": now()[0], "packet": pkt})
+
+            _text_app, text, from_id, _to_id, is_dm = classify(pkt, my_ids)
+            if not text or not from_id:
+                return
+            if not allowed(from_id):
+                return
+            if not is_dm:
+                return
+            if norm_id(from_id) == my_upper:
+                return
+
+            out_text = send_echo(interface or default_iface, from_id, text)
+            if out_text is None:
+                return
+            decoded = pkt.get("decoded") or {}
+            write({
+                "type": "tx_echo",
+                "ts": now()[0],
+                "dest": from_id,
+                "text": out_text,
+                "portnum": decoded.get("portnum", decoded.get("payloadVariant"))
+            })
+        except Exception as e:
+            if VERBOSE:
+                print(f"[WARN] topic_receive error: {e}", file=sys.stderr)
 
-        do_send_echo(interface or iface, from_id, text)
-        WRITER.write({
-            "type": "tx_echo",
-            "ts": now_ts()[0],
-            "dest": from_id,
-            "text": f"{ECHO_PREFIX}{text}" if ECHO_PREFIX else text,
-            "portnum": decoded.get("portnum", decoded.get("payloadVariant"))
-        })
-    except Exception as e:
-        if VERBOSE:
-            print(f"[WARN] topic_receive error: {e}", file=sys.stderr)
+    return topic_receive
 
 def on_connection_established(interface=None, **kwargs):
     if VERBOSE:
         print("[INFO] Connection established.", file=sys.stderr)
-    snapshot(label="snapshot_connect")
+    # runs on the pubsub dispatcher thread: hand the snapshot to periodic_snapshots()
+    _snapshot_wake.set()
 
 def on_connection_lost(interface=None, **kwargs):
     if VERBOSE:
         print("[INFO] Connection lost.", file=sys.stderr)
 
 # ---------- SNAPSHOTS ----------
+_snapshot_lock = threading.Lock()
+_snapshot_wake = threading.Event()   # set on connect (and shutdown) to wake the snapshot thread
+_prev_nodes: Optional[Dict[str, Any]] = None   # node table of the last snapshot, for deltas
+_deltas_since_full = 0
+
 def snapshot(label: str = "snapshot"):
+    global _prev_nodes, _deltas_since_full
+    raw_bytes = WRITER.fmt == "msgpack"
     try:
-        info = safe_to_dict(iface.getMyNodeInfo())
+        info = safe_to_dict(iface.getMyNodeInfo(), raw_bytes)
     except Exception:
         info = None
     try:
-        nodes = safe_to_dict(getattr(iface, "nodes", {}))
+        nodes = safe_to_dict(getattr(iface, "nodes", {}), raw_bytes)
     except Exception:
         nodes = None
     try:
-        radio = safe_to_dict(getattr(iface, "radioConfig", None))
+        radio = safe_to_dict(getattr(iface, "radioConfig", None), raw_bytes)
     except Exception:
         radio = None
-    WRITER.write({"type": label, "ts": now_ts()[0], "myInfo": info, "nodes": nodes, "radioConfig": radio})
+    with _snapshot_lock:
+        if not isinstance(nodes, dict):
+            nodes = None
+        prev = _prev_nodes
+        if (label == "snapshot_periodic" and nodes is not None and prev is not None
+                and _deltas_since_full < SNAPSHOT_FULL_EVERY - 1):
+            # steady-state meshes: only log nodes whose entry actually changed
+            event = {
+                "type": "snapshot_periodic_delta", "ts": now_ts()[0], "myInfo": info,
+                "added": {k: v for k, v in nodes.items() if k not in prev},
+                "changed": {k: v for k, v in nodes.items() if k in prev and prev[k] != v},
+                "removed": [k for k in prev if k not in nodes],
+                "radioConfig": radio,
+            }
+            _deltas_since_full += 1
+        else:
+            event = {"type": label, "ts": now_ts()[0], "myInfo": info, "nodes": nodes, "radioConfig": radio}
+            _deltas_since_full = 0
+        # safe_to_dict() built a fresh copy, so it can be kept and compared by value
+        # next time: no per-node encoding for change detection, and full snapshots
+        # are serialized exactly once (by write_encoded)
+        _prev_nodes = nodes
+    WRITER.write_encoded(event)
 
 def periodic_snapshots():
+    """Snapshot thread: a periodic snapshot every SNAPSHOT_EVERY_MIN, plus a
+    connect snapshot whenever on_connection_established() asks for one."""
+    period = max(60, SNAPSHOT_EVERY_MIN * 60)
+    due = time.monotonic() + period
     while not stop_event.is_set():
+        if _snapshot_wake.wait(timeout=max(0.0, due - time.monotonic())):
+            _snapshot_wake.clear()
+            label = "snapshot_connect"
+        else:
+            label = "snapshot_periodic"
+            due = time.monotonic() + period
+        if stop_event.is_set():
+            return
         try:
-            time.sleep(max(60, SNAPSHOT_EVERY_MIN * 60))
-            if stop_event.is_set():
-                break
-            snapshot(label="snapshot_periodic")
+            snapshot(label=label)
         except Exception:
             continue
 
-def setup_subscriptions():
-    pub.subscribe(topic_receive, "meshtastic.receive")
+_receive_handler = None   # pubsub only keeps weak references to listeners
+
+def setup_subscriptions(writer: HourlyNDJSONWriter, my_ids: Dict[str, Any]):
+    global _receive_handler
+    _receive_handler = make_topic_receive(writer, my_ids)
+    pub.subscribe(_receive_handler, "meshtastic.receive")
     pub.subscribe(on_connection_established, "meshtastic.connection.established")
     try:
         pub.subscribe(on_connection_lost, "meshtastic.connection.lost")
@@ -338,6 +740,7 @@ def shutdown(_signum=None, _frame=None):
     if VERBOSE:
         print("[INFO] Shutting down...", file=sys.stderr)
     stop_event.set()
+    _snapshot_wake.set()
     try:
         if iface:
             iface.close()
@@ -364,38 +767,76 @@ def ble_is_paired(mac: str) -> bool:
     except Exception:
         return False
 
-def btctl_cmds(cmds: list[str], timeout: int = 12) -> str:
-    """Run bluetoothctl non-interactively with a list of commands."""
-    script = "\n".join(cmds + ["quit"]) + "\n"
-    p = subprocess.run(
-        ["bluetoothctl"],
-        input=script,
-        text=True,
-        capture_output=True,
-        timeout=timeout
-    )
-    return (p.stdout or "") + (p.stderr or "")
-
-def ble_preflight_services_resolved(mac: str, wait_sec: int = 10) -> bool:
-    """Connect -> wait for ServicesResolved: yes -> disconnect."""
+class BtctlSession:
+    """One long-running bluetoothctl process driven over stdin (instead of a fork/exec per command)."""
+
+    def __init__(self):
+        self.p = subprocess.Popen(["bluetoothctl"], stdin=subprocess.PIPE,
+                                  stdout=subprocess.PIPE, stderr=subprocess.STDOUT)
+        self.out = ""
+
+    def send(self, cmd: str):
+        self.p.stdin.write((cmd + "\n").encode())
+        self.p.stdin.flush()
+
+    def read_for(self, sec: float) -> str:
+        """Collect whatever bluetoothctl prints during the next `sec` seconds."""
+        fd = self.p.stdout.fileno()
+        end = time.monotonic() + sec
+        chunks = []
+        while True:
+            left = end - time.monotonic()
+            if left <= 0:
+                break
+            ready, _, _ = select.select([fd], [], [], left)
+            if not ready:
+                break
+            data = os.read(fd, 4096)
+            if not data:   # bluetoothctl exited
+                break
+            chunks.append(data.decode("utf-8", errors="replace"))
+        text = "".join(chunks)
+        self.out += text
+        return text
+
+    def close(self, timeout: int = 5):
+        try:
+            self.send("quit")
+            self.p.communicate(timeout=timeout)
+        except Exception:
+            self.p.kill()
+            self.p.wait()
+
+def ble_preflight_services_resolved(mac: str, wait_sec: int = 10, connect_sec: int = 12) -> bool:
+    """Connect -> wait for ServicesResolved: yes -> disconnect, all in one bluetoothctl session."""
     if VERBOSE:
         print(f"[BLE] Preflight connect to {mac} to resolve services…", file=sys.stderr, flush=True)
-    out = btctl_cmds([f"connect {mac}", f"info {mac}"])
-    if "Connection successful" not in out and "Connected: yes" not in out:
-        if VERBOSE:
-            print("[BLE] bluetoothctl connect did not confirm; proceeding anyway.", file=sys.stderr)
-    # poll info for ServicesResolved: yes
-    deadline = time.time() + wait_sec
+    try:
+        bt = BtctlSession()
+    except Exception as e:
+        print(f"[BLE] Could not start bluetoothctl ({e}); proceeding anyway.", file=sys.stderr)
+        return False
     resolved = False
-    while time.time() < deadline:
-        info_out = btctl_cmds([f"info {mac}"])
-        if "ServicesResolved: yes" in info_out:
-            resolved = True
-            break
-        time.sleep(0.5)
-    # always disconnect to free the link for BLEInterface
-    btctl_cmds([f"disconnect {mac}"])
-    time.sleep(0.5)
+    try:
+        bt.send(f"connect {mac}")
+        # poll info for ServicesResolved: yes (bluetoothctl also prints [CHG] lines as it happens)
+        deadline = time.monotonic() + connect_sec + wait_sec
+        while time.monotonic() < deadline:
+            bt.send(f"info {mac}")
+            bt.read_for(0.5)
+            if "ServicesResolved: yes" in bt.out:
+                resolved = True
+                break
+        if "Connection successful" not in bt.out and "Connected: yes" not in bt.out:
+            if VERBOSE:
+                print("[BLE] bluetoothctl connect did not confirm; proceeding anyway.", file=sys.stderr)
+        # always disconnect to free the link for BLEInterface
+        bt.send(f"disconnect {mac}")
+        bt.read_for(0.5)
+    except Exception as e:
+        print(f"[BLE] Preflight error ({e}); proceeding anyway.", file=sys.stderr)
+    finally:
+        bt.close()
     if VERBOSE:
         print(f"[BLE] ServicesResolved: {'yes' if resolved else 'no'}", file=sys.stderr)
     return resolved
@@ -414,7 +855,11 @@ def main():
         label = LABEL.strip() or resolve_label_from_ble(BLE_ADDR)
 
     global WRITER
-    WRITER = HourlyNDJSONWriter(Path(LOG_ROOT), label)
+    try:
+        WRITER = HourlyNDJSONWriter(Path(LOG_ROOT), label)
+    except (ValueError, RuntimeError) as e:
+        print(f"ERROR: {e}", file=sys.stderr)
+        sys.exit(2)
 
     signal.signal(signal.SIGINT, shutdown)
     signal.signal(signal.SIGTERM, shutdown)
@@ -445,20 +890,29 @@ def main():
         print(f"ERROR: Could not open {TRANSPORT.upper()} interface: {e}", file=sys.stderr)
         sys.exit(3)
 
-    setup_subscriptions()
-
     global MY_IDS
     MY_IDS = get_my_ids(iface)
+
+    setup_subscriptions(WRITER, MY_IDS)
     if VERBOSE:
         print(f"[INFO] Connected. MyIDs={MY_IDS}  Label={label}", file=sys.stderr, flush=True)
 
     snapshot(label="snapshot_start")
 
     try:
-        while not stop_event.is_set():
-            time.sleep(0.25)
+        # signals still interrupt the wait; no periodic wakeups needed
+        while not stop_event.wait(3600):
+            pass
     finally:
         shutdown()
 
 if __name__ == "__main__":
+    if len(sys.argv) == 3 and sys.argv[1] == "--decode":
+        # msgpack archive -> NDJSON on stdout
+        if msgpack is None:
+            print("ERROR: --decode needs: pip install msgpack", file=sys.stderr)
+            sys.exit(2)
+        for _ev in read_msgpack_log(sys.argv[2]):
+            sys.stdout.buffer.write(dumps_bytes(_ev) + b"\n")
+        sys.exit(0)
     main()
@@ -1,7 +1,8 @@
 #!/usr/bin/env python3
 # meshtastic_webui_standalone_v1_2.py
 #
-# Single-file Meshtastic Web UI with zero external Python deps.
+# Single-file Meshtastic Web UI with zero external Python deps
+# (orjson is used when installed, for faster log parsing and JSON responses).
 # v1.2 adds:
 #   - Default HOST=0.0.0.0 (LAN accessible)
 #   - Messages tab: sortable headers for all columns
@@ -17,13 +18,31 @@
 #   ./meshtastic_logs/<LABEL>/<LABEL>_YYYY-MM-DD_HH.ndjson
 
 from __future__ import annotations
-import json, os, re
-from http.server import HTTPServer, BaseHTTPRequestHandler
+import gzip, hashlib, heapq, json, mmap, os, sys, time, zlib
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+from functools import lru_cache
+from operator import itemgetter
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
 from urllib.parse import urlparse, parse_qs
 from pathlib import Path
 from datetime import datetime, timedelta, timezone
 from statistics import median
-from typing import Any, Dict, List, Optional, Tuple
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+try:
+    import orjson   # parses bytes/memoryview directly, no decode step
+except ImportError:
+    orjson = None
+
+def dumps_bytes(obj: Any) -> bytes:
+    """UTF-8 JSON bytes for a response body; orjson emits bytes with no extra encode copy."""
+    if orjson is not None:
+        try:
+            return orjson.dumps(obj, option=orjson.OPT_NON_STR_KEYS)
+        except TypeError:
+            pass   # e.g. ints beyond 64 bits, which stdlib json still handles
+    return json.dumps(obj, ensure_ascii=False).encode("utf-8")
 
 # -------------------------
 # Config
@@ -34,19 +53,30 @@ DEFAULT_LOG_ROOT = "./meshtastic_logs"
 DEFAULT_LABEL: Optional[str] = None
 MAX_LOOKBACK_HOURS = 168
 MAX_MESSAGES_RETURN = 5000
+MAX_PARSE_WORKERS = 8
+STREAM_JSON_MIN_ROWS = 1000   # larger /api/messages responses are streamed, not built in memory
+STREAM_BATCH_ROWS = 256
+MAX_AGG_WIDTH = 8192          # cap for /api/node?agg=m4&w=<pixels>
+GZIP_MIN_BYTES = 1024         # smaller JSON bodies go out uncompressed
+GZIP_LEVEL = 5
+API_CACHE_CONTROL = "public, max-age=5, stale-while-revalidate=30"   # overview/messages
+INDEX_CACHE_CONTROL = "public, max-age=3600"   # the page; revalidated by ETag after that
 
 # -------------------------
 # Helpers
 # -------------------------
-HOUR_RE = re.compile(r".*_(\d{4}-\d{2}-\d{2})_(\d{2})\.ndjson$")
-
-def parse_hour_from_filename(p: Path) -> Optional[datetime]:
-    m = HOUR_RE.match(p.name)
-    if not m: return None
-    day, hour = m.groups()
+def parse_hour_from_filename(name: str) -> Optional[datetime]:
+    # fixed shape <LABEL>_YYYY-MM-DD_HH.ndjson: slice instead of regex + fromisoformat
+    if not name.endswith(".ndjson"): return None
+    core = name[:-7]
+    if len(core) < 14 or core[-14] != "_" or core[-3] != "_" or core[-9] != "-" or core[-6] != "-":
+        return None
+    digits = core[-13:-9] + core[-8:-6] + core[-5:-3] + core[-2:]
+    if not (digits.isascii() and digits.isdigit()): return None
     try:
-        return datetime.fromisoformat(f"{day}T{hour}:00:00+00:00")
-    except Exception:
+        return datetime(int(core[-13:-9]), int(core[-8:-6]), int(core[-5:-3]), int(core[-2:]),
+                        tzinfo=timezone.utc)
+    except ValueError:
         return None
 
 def to_utc(dt_str: Optional[str]) -> Optional[datetime]:
@@ -59,25 +89,45 @@ def to_utc(dt_str: Optional[str]) -> Optional[datetime]:
 def iso(dt: Optional[datetime]) -> Optional[str]:
     return dt.isoformat() if dt else None
 
-def app_name_from_portnum(portnum: Any) -> str:
+_EPOCH = datetime(1970, 1, 1, tzinfo=timezone.utc)
+_ONE_US = timedelta(microseconds=1)
+
+def ts_to_ns(dt_str: Optional[str]) -> Optional[int]:
+    """Event timestamp as integer UTC epoch nanoseconds; parsed once at ingest."""
+    dt = to_utc(dt_str)
+    return None if dt is None else (dt - _EPOCH) // _ONE_US * 1000
+
+def iso_ns(ns: Optional[int]) -> Optional[str]:
+    """Inverse of ts_to_ns, formatted like iso(to_utc(...))."""
+    return None if ns is None else (_EPOCH + timedelta(microseconds=ns // 1000)).isoformat()
+
+@lru_cache(maxsize=64, typed=True)
+def _app_name(portnum: Any) -> str:
     if isinstance(portnum, str) and portnum:
         return portnum
     if isinstance(portnum, int):
         return {1:"TEXT_MESSAGE_APP",3:"POSITION_APP",67:"TELEMETRY_APP"}.get(portnum, f"PORT_{portnum}")
     return "UNKNOWN"
 
+def app_name_from_portnum(portnum: Any) -> str:
+    if isinstance(portnum, (str, int)):
+        return _app_name(portnum)   # tiny domain: effectively a constant lookup
+    return "UNKNOWN"
+
 def safe_float(x: Any) -> Optional[float]:
+    if x is None: return None
+    if type(x) is float: return x
     try:
-        if x is None: return None
-        return float(x)
-    except Exception:
+        return float(x)   # int, numeric str
+    except (TypeError, ValueError, OverflowError):
         return None
 
 def safe_int(x: Any) -> Optional[int]:
+    if x is None: return None
+    if type(x) is int: return x
     try:
-        if x is None: return None
         return int(x)
-    except Exception:
+    except (TypeError, ValueError, OverflowError):
         return None
 
 def norm_node_ids(pkt: dict) -> Tuple[Optional[str], Optional[str]]:
@@ -123,6 +173,9 @@ def list_labels(log_root: Path) -> List[str]:
     labs.sort()
     return labs
 
+def default_label(labels: List[str]) -> str:
+    return DEFAULT_LABEL if (DEFAULT_LABEL in labels) else (labels[0] if labels else "")
+
 # -------------------------
 # Core loading & shaping
 # -------------------------
@@ -134,6 +187,11 @@ class DataBundle:
         self.my_node_id: Optional[str] = None
         self.files_loaded: List[str] = []
         self.app_set: set = set()
+        self.by_from: Dict[str, List[dict]] = {}   # from_id -> that node's messages, in order
+        # dropdown contents, computed once per bundle in load_bundle
+        self.from_ids: List[str] = []
+        self.to_ids: List[str] = []
+        self.apps_sorted: List[str] = []
 
 def _extract_position(decoded: dict) -> Optional[dict]:
     pos = decoded.get("position") or {}
@@ -160,150 +218,220 @@ def _extract_position(decoded: dict) -> Optional[dict]:
     if "satsInView" in pos: out["satsInView"] = safe_int(pos.get("satsInView"))
     return out
 
+# (messages, snapshots, apps, messages by from_id, to_ids)
+ParsedFile = Tuple[List[dict], List[dict], frozenset, Dict[str, List[dict]], frozenset]
+
+def _iter_events(path: str) -> Iterator[Any]:
+    """Parsed JSON value of each non-empty line. The file is mmapped and, with orjson,
+    each line is parsed straight from a memoryview slice: no per-line copy or decode."""
+    with open(path, "rb") as fp:
+        if not os.fstat(fp.fileno()).st_size:
+            return   # mmap cannot map an empty file
+        with mmap.mmap(fp.fileno(), 0, access=mmap.ACCESS_READ) as mm, memoryview(mm) as view:
+            find = mm.find
+            end = len(mm)
+            pos = 0
+            while pos < end:
+                nl = find(b"\n", pos)
+                if nl < 0: nl = end
+                if nl > pos:
+                    try:
+                        if orjson is not None:
+                            with view[pos:nl] as line:   # released before mm closes
+                                ev = orjson.loads(line)
+                        else:
+                            ev = json.loads(mm[pos:nl])
+                    except ValueError:   # JSONDecodeError (both libs) and UnicodeDecodeError
+                        ev = None
+                    else:
+                        yield ev
+                pos = nl + 1
+
+def _parse_file(path: str) -> ParsedFile:
+    """Parse one hourly NDJSON file."""
+    messages: List[dict] = []
+    snapshots: List[dict] = []
+    by_from: Dict[str, List[dict]] = {}
+    intern = sys.intern
+    try:
+        for ev in _iter_events(path):
+            if not isinstance(ev, dict): continue
+            et = ev.get("type")
+            if et and et.startswith("snapshot"):
+                nodes = ev.get("nodes")
+                if nodes is None and et.endswith("_delta"):
+                    # sniffer delta snapshots carry only new/changed node entries
+                    nodes = {**(ev.get("added") or {}), **(ev.get("changed") or {})}
+                snapshots.append({
+                    "ts": ev.get("ts"),
+                    "myInfo": ev.get("myInfo"),
+                    "nodes": nodes,
+                    "radioConfig": ev.get("radioConfig"),
+                })
+                continue
+            if et in ("rx","tx_echo"):
+                pkt = ev.get("packet") or {}
+                decoded = pkt.get("decoded") or {}
+                app = intern(app_name_from_portnum(decoded.get("portnum", decoded.get("payloadVariant"))))
+                from_id, to_id = norm_node_ids(pkt)
+                # a mesh has a few dozen ids and apps: share one string object per value
+                if from_id is not None: from_id = intern(from_id)
+                if to_id is not None: to_id = intern(to_id)
+                pos = _extract_position(decoded)
+                msg = {
+                    "ts": ev.get("ts"),
+                    "ts_ns": ts_to_ns(ev.get("ts")),
+                    "etype": et,
+                    "from_id": from_id,
+                    "to_id": to_id,
+                    "app": app,
+                    "text": decoded.get("text"),
+                    "channel": pkt.get("channel"),
+                    "rxRssi": safe_float(pkt.get("rxRssi")),
+                    "rxSnr": safe_float(pkt.get("rxSnr")),
+                    "hopLimit": safe_int(pkt.get("hopLimit")),
+                    "hopStart": safe_int(pkt.get("hopStart")),
+                    "relayNode": pkt.get("relayNode"),
+                    "priority": pkt.get("priority"),
+                    "id": pkt.get("id"),
+                    "is_encrypted": bool(pkt.get("encrypted") or pkt.get("pkiEncrypted")),
+                    "decoded_isPrivate": bool(decoded.get("isPrivate")) if decoded.get("isPrivate") is not None else None,
+                    "decoded_dm": bool(decoded.get("dm")) if decoded.get("dm") is not None else None,
+                    "telemetry": decoded.get("telemetry") or {},
+                    "position": pos,
+                }
+                # readers use m.get(), so absent and None/empty are equivalent; leaving
+                # them out roughly halves the size of a typical message dict
+                msg = {k: v for k, v in msg.items() if v is not None and v != {}}
+                messages.append(msg)
+                if from_id:
+                    by_from.setdefault(from_id, []).append(msg)
+    except Exception:
+        pass
+    # distinct apps in one C-level pass at the end rather than a set.add per message
+    return (messages, snapshots, frozenset(map(itemgetter("app"), messages)), by_from,
+            frozenset(filter(None, [m.get("to_id") for m in messages])))
+
+@lru_cache(maxsize=512)
+def _parse_file_cached(path: str, mtime_ns: int, size: int) -> ParsedFile:
+    # mtime/size are only part of the key: a rewritten file gets a fresh entry.
+    # Callers must treat the returned lists as read-only; they are shared between requests.
+    return _parse_file(path)
+
+def load_file(path: str) -> ParsedFile:
+    """Parsed contents of one log file, from cache unless it may still be growing."""
+    try:
+        st = os.stat(path)
+    except OSError:
+        return [], [], frozenset(), {}, frozenset()
+    if time.time() - st.st_mtime < 3600:
+        return _parse_file(path)   # the sniffer may still be appending to this hour
+    return _parse_file_cached(path, st.st_mtime_ns, st.st_size)
+
 def load_bundle(log_root: str, label: str, mode: str, hours: int) -> DataBundle:
     root = Path(log_root).expanduser().resolve()
     label_dir = root / label
     out = DataBundle()
-    if not label_dir.exists():
-        return out
 
-    files = sorted([str(p) for p in label_dir.glob(f"{label}_*.ndjson")])
-    if not files:
+    # one directory read; DirEntry carries the name and caches its stat result
+    prefix = f"{label}_"
+    try:
+        with os.scandir(label_dir) as it:
+            entries = [e for e in it
+                       if e.name.startswith(prefix) and e.name.endswith(".ndjson") and e.is_file()]
+    except OSError:
+        return out
+    if not entries:
         return out
+    entries.sort(key=lambda e: e.name)
 
     if mode == "lastfile":
-        chosen = [max(files, key=lambda f: os.path.getmtime(f))]
+        chosen = [max(entries, key=lambda e: e.stat().st_mtime)]
     else:
         hours = max(1, min(hours, MAX_LOOKBACK_HOURS))
         now = datetime.now(timezone.utc)
-        cutoff = now - timedelta(hours=hours)
+        cutoff = (now - timedelta(hours=hours)).replace(minute=0, second=0, microsecond=0)
         chosen = []
-        for f in files:
-            dt = parse_hour_from_filename(Path(f))
-            if dt and dt >= cutoff.replace(minute=0, second=0, microsecond=0):
-                chosen.append(f)
+        for e in entries:
+            dt = parse_hour_from_filename(e.name)
+            if dt and dt >= cutoff:
+                chosen.append(e)
         if not chosen:
-            chosen = [files[-1]]
+            chosen = [entries[-1]]
 
-    out.files_loaded = [Path(f).name for f in chosen]
+    out.files_loaded = [e.name for e in chosen]
+    chosen = [e.path for e in chosen]
 
-    for f in chosen:
-        try:
-            with open(f, "r", encoding="utf-8") as fp:
-                for line in fp:
-                    line = line.strip()
-                    if not line: continue
-                    try:
-                        ev = json.loads(line)
-                    except Exception:
-                        continue
-                    et = ev.get("type")
-                    if et and et.startswith("snapshot"):
-                        out.snapshots.append({
-                            "ts": ev.get("ts"),
-                            "myInfo": ev.get("myInfo"),
-                            "nodes": ev.get("nodes"),
-                            "radioConfig": ev.get("radioConfig"),
-                        })
-                        continue
-                    if et in ("rx","tx_echo"):
-                        pkt = ev.get("packet") or {}
-                        decoded = pkt.get("decoded") or {}
-                        app = app_name_from_portnum(decoded.get("portnum", decoded.get("payloadVariant")))
-                        from_id, to_id = norm_node_ids(pkt)
-                        pos = _extract_position(decoded)
-                        msg = {
-                            "ts": ev.get("ts"),
-                            "etype": et,
-                            "from_id": from_id,
-                            "to_id": to_id,
-                            "app": app,
-                            "text": decoded.get("text"),
-                            "channel": pkt.get("channel"),
-                            "rxRssi": safe_float(pkt.get("rxRssi")),
-                            "rxSnr": safe_float(pkt.get("rxSnr")),
-                            "hopLimit": safe_int(pkt.get("hopLimit")),
-                            "hopStart": safe_int(pkt.get("hopStart")),
-                            "relayNode": pkt.get("relayNode"),
-                            "priority": pkt.get("priority"),
-                            "id": pkt.get("id"),
-                            "is_encrypted": bool(pkt.get("encrypted") or pkt.get("pkiEncrypted")),
-                            "decoded_isPrivate": bool(decoded.get("isPrivate")) if decoded.get("isPrivate") is not None else None,
-                            "decoded_dm": bool(decoded.get("dm")) if decoded.get("dm") is not None else None,
-                            "telemetry": decoded.get("telemetry") or {},
-                            "position": pos,
-                        }
-                        out.messages.append(msg)
-                        out.app_set.add(app)
-        except Exception:
-            continue
+    if len(chosen) > 1:
+        # files are independent; map() keeps results in chronological file order
+        with ThreadPoolExecutor(max_workers=min(MAX_PARSE_WORKERS, len(chosen))) as pool:
+            parsed = list(pool.map(load_file, chosen))
+    else:
+        parsed = [load_file(f) for f in chosen]
+    to_ids: set = set()
+    for messages, snapshots, apps, by_from, file_to_ids in parsed:
+        out.messages.extend(messages)
+        for nid, node_msgs in by_from.items():
+            lst = out.by_from.get(nid)
+            if lst is None:
+                out.by_from[nid] = list(node_msgs)   # copy: the per-file lists are cached
+            else:
+                lst.extend(node_msgs)
+        out.snapshots.extend(snapshots)
+        out.app_set |= apps
+        to_ids |= file_to_ids
+    out.from_ids = sorted(out.by_from)   # by_from is keyed by every non-empty from_id
+    out.to_ids = sorted(to_ids)
+    out.apps_sorted = sorted(out.app_set)
 
     out.name_map = harvest_name_map_from_snapshots(out.snapshots)
     out.my_node_id = detect_my_node_from_snapshots(out.snapshots)
     return out
 
-def latest_by_node_telemetry(messages: List[dict]) -> Tuple[Dict[str,dict], Dict[str,dict], Dict[str,dict]]:
-    dev_last: Dict[str, dict] = {}
-    env_last: Dict[str, dict] = {}
-    loc_last: Dict[str, dict] = {}
-    for m in messages:
-        nid = m.get("from_id")
-        tel = m.get("telemetry") or {}
-        if not nid or not tel: continue
-        ts = to_utc(m.get("ts"))
-        if "deviceMetrics" in tel and isinstance(tel["deviceMetrics"], dict):
-            dev_last[nid] = {"ts": iso(ts), **tel["deviceMetrics"]}
-        if "environmentMetrics" in tel and isinstance(tel["environmentMetrics"], dict):
-            env_last[nid] = {"ts": iso(ts), **tel["environmentMetrics"]}
-        if "localStats" in tel and isinstance(tel["localStats"], dict):
-            loc_last[nid] = {"ts": iso(ts), **tel["localStats"]}
-    return dev_last, env_last, loc_last
-
 def build_overview(bundle: DataBundle, include_encrypted: bool, apps_filter: Optional[List[str]]) -> dict:
-    msgs = bundle.messages
-    if not include_encrypted:
-        msgs = [m for m in msgs if not m.get("is_encrypted")]
-    if apps_filter:
-        apps_set = set(apps_filter)
-        msgs = [m for m in msgs if m.get("app") in apps_set]
-
-    by_node: Dict[str, dict] = {}
-    for m in msgs:
+    apps_set = set(apps_filter) if apps_filter else None
+
+    # filter and group in one pass, then reduce each node's slice with C-level
+    # builtins (min/max/median/Counter)
+    filtered = not include_encrypted or apps_set is not None
+    by_node: Dict[str, List[dict]] = {}
+    dev_last: Dict[str, dict] = {}   # node -> its last device / environment telemetry message
+    env_last: Dict[str, dict] = {}
+    for m in bundle.messages:
         nid = m.get("from_id")
         if not nid: continue
-        ts = to_utc(m.get("ts"))
-        rec = by_node.setdefault(nid, {
-            "first_heard": None, "last_heard": None,
-            "total_msgs": 0,
-            "rssi_vals": [], "snr_vals": [],
-            "app_counts": {}
-        })
-        rec["total_msgs"] += 1
-        if ts:
-            if rec["first_heard"] is None or ts < rec["first_heard"]: rec["first_heard"] = ts
-            if rec["last_heard"] is None or ts > rec["last_heard"]:   rec["last_heard"] = ts
-        rssi = m.get("rxRssi"); snr = m.get("rxSnr")
-        if rssi is not None: rec["rssi_vals"].append(rssi)
-        if snr  is not None: rec["snr_vals"].append(snr)
-        app = m.get("app") or "UNKNOWN"
-        rec["app_counts"][app] = rec["app_counts"].get(app, 0) + 1
-
-    dev_last, env_last, _ = latest_by_node_telemetry(bundle.messages)
+        tel = m.get("telemetry")
+        if tel and isinstance(tel, dict):
+            # latest telemetry deliberately ignores the enc/app filters
+            if isinstance(tel.get("deviceMetrics"), dict): dev_last[nid] = m
+            if isinstance(tel.get("environmentMetrics"), dict): env_last[nid] = m
+        if filtered:
+            if not include_encrypted and m.get("is_encrypted"): continue
+            if apps_set is not None and m.get("app") not in apps_set: continue
+        group = by_node.get(nid)
+        if group is None:
+            by_node[nid] = group = []
+        group.append(m)
 
     rows: List[dict] = []
-    for nid, rec in by_node.items():
+    for nid, group in by_node.items():
+        ts_vals = [t for t in [m.get("ts_ns") for m in group] if t is not None]
+        rssi_vals = [v for v in [m.get("rxRssi") for m in group] if v is not None]
+        snr_vals  = [v for v in [m.get("rxSnr") for m in group] if v is not None]
         nameinfo = bundle.name_map.get(nid, {})
+        dev = dev_last.get(nid)
+        env = env_last.get(nid)
         row = {
             "node_id": nid,
             "name": nameinfo.get("short") or nameinfo.get("long") or nid,
-            "first_heard": iso(rec["first_heard"]),
-            "last_heard": iso(rec["last_heard"]),
-            "total_msgs": rec["total_msgs"],
-            "median_rssi": (median(rec["rssi_vals"]) if rec["rssi_vals"] else None),
-            "median_snr":  (median(rec["snr_vals"])  if rec["snr_vals"]  else None),
-            "app_counts": rec["app_counts"],
-            "device": dev_last.get(nid),
-            "environment": env_last.get(nid),
+            "first_heard": iso_ns(min(ts_vals)) if ts_vals else None,
+            "last_heard": iso_ns(max(ts_vals)) if ts_vals else None,
+            "total_msgs": len(group),
+            "median_rssi": (median(rssi_vals) if rssi_vals else None),
+            "median_snr":  (median(snr_vals)  if snr_vals  else None),
+            "app_counts": dict(Counter([m.get("app") or "UNKNOWN" for m in group])),
+            "device": {"ts": iso_ns(dev.get("ts_ns")), **dev["telemetry"]["deviceMetrics"]} if dev else None,
+            "environment": {"ts": iso_ns(env.get("ts_ns")), **env["telemetry"]["environmentMetrics"]} if env else None,
         }
         rows.append(row)
 
@@ -312,51 +440,115 @@ def build_overview(bundle: DataBundle, include_encrypted: bool, apps_filter: Opt
     return {
         "files_loaded": bundle.files_loaded,
         "my_node_id": bundle.my_node_id,
-        "apps_available": sorted(list(bundle.app_set)),
+        "apps_available": bundle.apps_sorted,
         "nodes": rows
     }
 
-def build_node_detail(bundle: DataBundle, node_id: str, include_encrypted: bool, apps_filter: Optional[List[str]]) -> dict:
-    msgs = bundle.messages
-    if not include_encrypted:
-        msgs = [m for m in msgs if not m.get("is_encrypted")]
-    if apps_filter:
-        apps_set = set(apps_filter)
-        msgs = [m for m in msgs if m.get("app") in apps_set]
-    msgs = [m for m in msgs if m.get("from_id") == node_id]
-
-    ts_list = [to_utc(m.get("ts")) for m in msgs if to_utc(m.get("ts"))]
+def m4_downsample(rows: List[dict], ts_ns: List[Optional[int]], width: int) -> Tuple[List[dict], List[Optional[int]]]:
+    """M4 aggregation for a chart `width` pixels wide: split the time range into
+    `width` buckets and keep, per bucket, the first and last row plus the rows
+    holding the min and max of every numeric field. Single pass; order is kept.
+    Returns the kept rows and their timestamps."""
+    if width <= 0 or len(rows) <= 4 * width:
+        return rows, ts_ns
+    known = [t for t in ts_ns if t is not None]
+    if not known:
+        return rows, ts_ns
+    t0 = min(known)
+    span = max(known) - t0 + 1
+    buckets: Dict[int, dict] = {}
+    for i, t in enumerate(ts_ns):
+        if t is None:
+            continue
+        b = (t - t0) * width // span
+        st = buckets.get(b)
+        if st is None:
+            buckets[b] = st = {"first": (t, i), "last": (t, i)}
+        else:
+            if t < st["first"][0]: st["first"] = (t, i)
+            if t >= st["last"][0]: st["last"] = (t, i)
+        for k, v in rows[i].items():
+            if isinstance(v, bool) or not isinstance(v, (int, float)):
+                continue
+            lo = st.get(("min", k))
+            if lo is None or v < lo[0]: st[("min", k)] = (v, i)
+            hi = st.get(("max", k))
+            if hi is None or v > hi[0]: st[("max", k)] = (v, i)
+    keep = sorted({i for st in buckets.values() for _, i in st.values()})
+    return [rows[i] for i in keep], [ts_ns[i] for i in keep]
+
+def _is_num(v: Any) -> bool:
+    return isinstance(v, (int, float)) and not isinstance(v, bool)
+
+def to_columns(rows: List[dict], ts_ns: List[Optional[int]]) -> dict:
+    """Column (SoA) form of a chart series: "ts" in epoch ms plus one list per
+    numeric field (None where a row lacks it), with a typed-array hint per
+    column: "i32" for gap-free int columns that fit, "f32" otherwise."""
+    keys: List[str] = []
+    for r in rows:
+        for k, v in r.items():
+            if k != "ts" and k not in keys and _is_num(v):
+                keys.append(k)
+    cols: Dict[str, list] = {"ts": [t // 1_000_000 if t is not None else None for t in ts_ns]}
+    dtypes = {"ts": "f64"}
+    for k in keys:
+        col = [v if _is_num(v) else None for v in [r.get(k) for r in rows]]
+        cols[k] = col
+        dtypes[k] = "i32" if all(type(v) is int and -2**31 <= v < 2**31 for v in col) else "f32"
+    return {"cols": cols, "dtypes": dtypes}
+
+def build_node_detail(bundle: DataBundle, node_id: str, include_encrypted: bool, apps_filter: Optional[List[str]],
+                      agg_width: int = 0, columns: bool = False) -> dict:
+    apps_set = set(apps_filter) if apps_filter else None
+    msgs = bundle.by_from.get(node_id, [])
+    if not include_encrypted or apps_set is not None:
+        msgs = [m for m in msgs
+                if (include_encrypted or not m.get("is_encrypted"))
+                and (apps_set is None or m.get("app") in apps_set)]
+
+    ts_list = [t for t in [m.get("ts_ns") for m in msgs] if t is not None]
     rssi_vals = [m.get("rxRssi") for m in msgs if m.get("rxRssi") is not None]
     snr_vals  = [m.get("rxSnr")  for m in msgs if m.get("rxSnr") is not None]
 
     dev_series: List[dict] = []
     env_series: List[dict] = []
     pos_series: List[dict] = []
+    dev_ns: List[Optional[int]] = []
+    env_ns: List[Optional[int]] = []
     for m in msgs:
         tel = m.get("telemetry") or {}
-        ts = iso(to_utc(m.get("ts")))
+        t = m.get("ts_ns")
+        ts = iso_ns(t)
         if "deviceMetrics" in tel and isinstance(tel["deviceMetrics"], dict):
             dev_series.append({"ts": ts, **tel["deviceMetrics"]})
+            dev_ns.append(t)
         if "environmentMetrics" in tel and isinstance(tel["environmentMetrics"], dict):
             env_series.append({"ts": ts, **tel["environmentMetrics"]})
+            env_ns.append(t)
         pos = m.get("position")
         if isinstance(pos, dict) and pos.get("lat") is not None and pos.get("lon") is not None:
             pos_series.append({"ts": ts, "lat": pos["lat"], "lon": pos["lon"], "altitude": pos.get("altitude")})
 
-    rq_series = [{"ts": iso(to_utc(m.get("ts"))), "rxRssi": m.get("rxRssi"), "rxSnr": m.get("rxSnr")} for m in msgs]
+    rq_series = [{"ts": iso_ns(m.get("ts_ns")), "rxRssi": m.get("rxRssi"), "rxSnr": m.get("rxSnr")} for m in msgs]
+    rq_ns: List[Optional[int]] = [m.get("ts_ns") for m in msgs]
+
+    if agg_width > 0:
+        dev_series, dev_ns = m4_downsample(dev_series, dev_ns, agg_width)
+        env_series, env_ns = m4_downsample(env_series, env_ns, agg_width)
+        rq_series, rq_ns = m4_downsample(rq_series, rq_ns, agg_width)
 
     nameinfo = bundle.name_map.get(node_id, {})
     return {
         "node_id": node_id,
         "name": nameinfo.get("short") or nameinfo.get("long") or node_id,
-        "first_heard": iso(min(ts_list)) if ts_list else None,
-        "last_heard": iso(max(ts_list)) if ts_list else None,
+        "first_heard": iso_ns(min(ts_list)) if ts_list else None,
+        "last_heard": iso_ns(max(ts_list)) if ts_list else None,
         "total_msgs": len(msgs),
         "median_rssi": median(rssi_vals) if rssi_vals else None,
         "median_snr":  median(snr_vals)  if snr_vals  else None,
-        "telemetry_device": dev_series,
-        "telemetry_env": env_series,
-        "radio_quality": rq_series,
+        "telemetry_device": to_columns(dev_series, dev_ns) if columns else dev_series,
+        "telemetry_env": to_columns(env_series, env_ns) if columns else env_series,
+        "radio_quality": to_columns(rq_series, rq_ns) if columns else rq_series,
         "positions": pos_series,
     }
 
@@ -370,24 +562,27 @@ def build_messages(bundle: DataBundle, include_encrypted: bool, apps_filter: Opt
             return to_id.upper() == my_node_id.upper()
         return False
 
-    msgs = bundle.messages
-    if not include_encrypted:
-        msgs = [m for m in msgs if not m.get("is_encrypted")]
-    if apps_filter:
-        apps_set = set(apps_filter)
-        msgs = [m for m in msgs if m.get("app") in apps_set]
-    if from_id:
-        msgs = [m for m in msgs if m.get("from_id") == from_id]
-    if to_id:
-        msgs = [m for m in msgs if m.get("to_id") == to_id]
-    if dm_only:
-        msgs = [m for m in msgs if infer_is_dm(m.get("decoded_isPrivate"), m.get("decoded_dm"), m.get("to_id"), my_node_id)]
-    if text_contains:
-        s = text_contains.lower()
-        msgs = [m for m in msgs if isinstance(m.get("text"), str) and s in m["text"].lower()]
-
-    msgs.sort(key=lambda m: to_utc(m.get("ts")) or datetime.fromtimestamp(0, tz=timezone.utc), reverse=True)
-    msgs = msgs[:max(1, min(limit, MAX_MESSAGES_RETURN))]
+    apps_set = set(apps_filter) if apps_filter else None
+    needle = text_contains.lower() if text_contains else None
+    # the "from" filter is answered by the index; the rest run in one pass
+    source = bundle.by_from.get(from_id, []) if from_id else bundle.messages
+    if include_encrypted and apps_set is None and not (to_id or dm_only or needle):
+        msgs = source   # default filters: no copy (nlargest below only reads it)
+    else:
+        msgs = []
+        for m in source:
+            if not include_encrypted and m.get("is_encrypted"): continue
+            if apps_set is not None and m.get("app") not in apps_set: continue
+            if to_id and m.get("to_id") != to_id: continue
+            if dm_only and not infer_is_dm(m.get("decoded_isPrivate"), m.get("decoded_dm"), m.get("to_id"), my_node_id): continue
+            if needle is not None:
+                text = m.get("text")
+                if not isinstance(text, str) or needle not in text.lower(): continue
+            msgs.append(m)
+
+    # newest `limit` only: O(N log K) heap instead of sorting every match
+    msgs = heapq.nlargest(max(1, min(limit, MAX_MESSAGES_RETURN)), msgs,
+                          key=lambda m: m.get("ts_ns") or 0)
 
     def id_to_name(nid: Optional[str]) -> str:
         if not isinstance(nid, str): return ""
@@ -418,21 +613,116 @@ def build_messages(bundle: DataBundle, include_encrypted: bool, apps_filter: Opt
 # -------------------------
 # HTTP Handler
 # -------------------------
+def _param(q: Dict[str, List[str]], key: str, default: str = "") -> str:
+    return (q.get(key) or [default])[0]
+
+def _int_param(q: Dict[str, List[str]], key: str, default: int) -> int:
+    raw = _param(q, key)
+    if not raw:
+        return default
+    try:
+        return int(raw)
+    except ValueError:
+        raise ValueError(f"bad {key}: {raw!r}") from None
+
 class Handler(BaseHTTPRequestHandler):
-    def _send_json(self, obj, code=200):
-        body = json.dumps(obj).encode("utf-8")
+    @staticmethod
+    def _common(q: Dict[str, List[str]]) -> Tuple[str, str, str, int, bool, Optional[List[str]]]:
+        """(root, label, mode, hours, include_encrypted, apps) shared by the data endpoints.
+        Raises ValueError on malformed numbers; do_GET turns that into a 400."""
+        apps_filter = _param(q, "apps")
+        return (
+            _param(q, "root", DEFAULT_LOG_ROOT),
+            _param(q, "label"),
+            "lastfile" if _param(q, "mode", "hours") == "lastfile" else "hours",
+            _int_param(q, "hours", 1),
+            _param(q, "enc", "1") == "1",
+            [a for a in apps_filter.split(",") if a] if apps_filter else None,
+        )
+
+    def _accepts_gzip(self) -> bool:
+        return "gzip" in (self.headers.get("Accept-Encoding") or "").lower()
+
+    def _send_json(self, obj, code=200, cache="no-store"):
+        body = dumps_bytes(obj)
+        gz = len(body) >= GZIP_MIN_BYTES and self._accepts_gzip()
+        if gz:
+            body = gzip.compress(body, compresslevel=GZIP_LEVEL)
         self.send_response(code)
         self.send_header("Content-Type", "application/json; charset=utf-8")
-        self.send_header("Cache-Control", "no-store")
+        self.send_header("Cache-Control", cache)
+        self.send_header("Vary", "Accept-Encoding")
+        if gz:
+            self.send_header("Content-Encoding", "gzip")
         self.send_header("Content-Length", str(len(body)))
         self.end_headers()
         self.wfile.write(body)
 
-    def _send_html(self, html: str, code=200):
-        body = html.encode("utf-8")
+    def _begin_stream(self, content_type: str, code=200, cache="no-store"):
+        """Send headers for a close-delimited body (no Content-Length: on this
+        HTTP/1.0 server the connection close ends it) and return a write function.
+        With gzip, every write goes through one streaming compressor and is
+        sync-flushed, so the client can decode each piece as it arrives."""
+        gz = self._accepts_gzip()
         self.send_response(code)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Cache-Control", cache)
+        self.send_header("Vary", "Accept-Encoding")
+        if gz:
+            self.send_header("Content-Encoding", "gzip")
+        self.send_header("Connection", "close")
+        self.end_headers()
+        self.close_connection = True
+        raw_write = self.wfile.write
+        if not gz:
+            return raw_write, lambda: None
+        z = zlib.compressobj(GZIP_LEVEL, zlib.DEFLATED, 31)   # wbits 31: gzip container
+        def write(b: bytes):
+            raw_write(z.compress(b) + z.flush(zlib.Z_SYNC_FLUSH))
+        return write, lambda: raw_write(z.flush())
+
+    def _stream_json(self, obj: dict, key: str, code=200, cache="no-store"):
+        """Send obj with its big list obj[key] encoded a slice at a time."""
+        rows = obj[key]
+        rest = {k: v for k, v in obj.items() if k != key}
+        write, finish = self._begin_stream("application/json; charset=utf-8", code, cache)
+        write(b"{" + dumps_bytes(key) + b":[")
+        for i in range(0, len(rows), STREAM_BATCH_ROWS):
+            if i: write(b",")
+            write(b",".join([dumps_bytes(r) for r in rows[i:i + STREAM_BATCH_ROWS]]))
+        write(b"]," + dumps_bytes(rest)[1:] if rest else b"]}")
+        finish()
+
+    def _stream_ndjson(self, head: dict, rows: List[dict], code=200, cache="no-store"):
+        """NDJSON: `head` on the first line, then one row per line, so the client
+        can render the first rows before the rest have been received."""
+        write, finish = self._begin_stream("application/x-ndjson; charset=utf-8", code, cache)
+        write(dumps_bytes(head) + b"\n")
+        for i in range(0, len(rows), STREAM_BATCH_ROWS):
+            write(b"\n".join([dumps_bytes(r) for r in rows[i:i + STREAM_BATCH_ROWS]]) + b"\n")
+        finish()
+
+    def _send_index(self):
+        """The page is static for the life of the process: serve the bytes (or the
+        gzip copy) prepared at import, and answer revalidations with 304."""
+        gz = self._accepts_gzip()
+        etag = INDEX_ETAG_GZ if gz else INDEX_ETAG
+        inm = self.headers.get("If-None-Match") or ""
+        if inm.strip() == "*" or any(t.strip() in (INDEX_ETAG, INDEX_ETAG_GZ) for t in inm.split(",")):
+            self.send_response(304)
+            self.send_header("ETag", etag)
+            self.send_header("Cache-Control", INDEX_CACHE_CONTROL)
+            self.send_header("Vary", "Accept-Encoding")
+            self.end_headers()
+            return
+        body = INDEX_HTML_GZ if gz else INDEX_HTML_BYTES
+        self.send_response(200)
         self.send_header("Content-Type", "text/html; charset=utf-8")
-        self.send_header("Cache-Control", "no-store")
+        self.send_header("Cache-Control", INDEX_CACHE_CONTROL)
+        self.send_header("ETag", etag)
+        self.send_header("Vary", "Accept-Encoding")
+        if gz:
+            self.send_header("Content-Encoding", "gzip")
         self.send_header("Content-Length", str(len(body)))
         self.end_headers()
         self.wfile.write(body)
@@ -442,73 +732,64 @@ class Handler(BaseHTTPRequestHandler):
         q = parse_qs(u.query)
 
         if u.path == "/":
-            return self._send_html(INDEX_HTML)
+            return self._send_index()
 
         if u.path == "/api/labels":
-            root = q.get("root", [DEFAULT_LOG_ROOT])[0]
+            root = _param(q, "root", DEFAULT_LOG_ROOT)
             labs = list_labels(Path(root).expanduser().resolve())
-            default_label = DEFAULT_LABEL if (DEFAULT_LABEL in labs) else (labs[0] if labs else "")
-            return self._send_json({"labels": labs, "default": default_label})
-
-        if u.path == "/api/overview":
-            root = q.get("root", [DEFAULT_LOG_ROOT])[0]
-            label = q.get("label", [""])[0]
-            mode  = q.get("mode", ["hours"])[0]
-            hours = int(q.get("hours", ["1"])[0])
-            include_encrypted = q.get("enc", ["1"])[0] == "1"
-            apps_filter = q.get("apps", [""])[0]
-            apps = [a for a in apps_filter.split(",") if a] if apps_filter else None
-
+            return self._send_json({"labels": labs, "default": default_label(labs)})
+
+        if u.path in ("/api/overview", "/api/node", "/api/messages"):
+            try:
+                root, label, mode, hours, include_encrypted, apps = self._common(q)
+                if u.path == "/api/messages":
+                    limit = _int_param(q, "limit", 1000)
+                if u.path == "/api/node":
+                    agg_width = _int_param(q, "w", 0) if _param(q, "agg") == "m4" else 0
+            except ValueError as e:
+                return self._send_json({"error": str(e)}, 400)
+            if not label:
+                # same pick as /api/labels, so the UI need not wait for it
+                label = default_label(list_labels(Path(root).expanduser().resolve()))
             if not label:
                 return self._send_json({"error": "missing label"}, 400)
 
-            bundle = load_bundle(root, label, "lastfile" if mode=="lastfile" else "hours", hours)
+        if u.path == "/api/overview":
+            bundle = load_bundle(root, label, mode, hours)
             ov = build_overview(bundle, include_encrypted, apps)
-            return self._send_json(ov)
+            return self._send_json(ov, cache=API_CACHE_CONTROL)
 
         if u.path == "/api/node":
-            root = q.get("root", [DEFAULT_LOG_ROOT])[0]
-            label = q.get("label", [""])[0]
-            mode  = q.get("mode", ["hours"])[0]
-            hours = int(q.get("hours", ["1"])[0])
-            include_encrypted = q.get("enc", ["1"])[0] == "1"
-            apps_filter = q.get("apps", [""])[0]
-            apps = [a for a in apps_filter.split(",") if a] if apps_filter else None
-            node_id = q.get("node_id", [""])[0]
-
-            if not label or not node_id:
+            node_id = _param(q, "node_id")
+            if not node_id:
                 return self._send_json({"error": "missing label or node_id"}, 400)
 
-            bundle = load_bundle(root, label, "lastfile" if mode=="lastfile" else "hours", hours)
-            detail = build_node_detail(bundle, node_id, include_encrypted, apps)
+            bundle = load_bundle(root, label, mode, hours)
+            detail = build_node_detail(bundle, node_id, include_encrypted, apps,
+                                       max(0, min(agg_width, MAX_AGG_WIDTH)),
+                                       columns=_param(q, "layout") == "cols")
             return self._send_json(detail)
 
         if u.path == "/api/messages":
-            root = q.get("root", [DEFAULT_LOG_ROOT])[0]
-            label = q.get("label", [""])[0]
-            mode  = q.get("mode", ["hours"])[0]
-            hours = int(q.get("hours", ["1"])[0])
-            include_encrypted = q.get("enc", ["1"])[0] == "1"
-            apps_filter = q.get("apps", [""])[0]
-            apps = [a for a in apps_filter.split(",") if a] if apps_filter else None
-            my_override = q.get("my", [""])[0] or None
-            from_id = q.get("from", [""])[0] or None
-            to_id   = q.get("to", [""])[0] or None
-            dm_only = q.get("dm", ["0"])[0] == "1"
-            text_contains = q.get("q", [""])[0] or None
-            limit = int(q.get("limit", ["1000"])[0])
-
-            if not label:
-                return self._send_json({"error": "missing label"}, 400)
+            my_override = _param(q, "my") or None
+            from_id = _param(q, "from") or None
+            to_id   = _param(q, "to") or None
+            dm_only = _param(q, "dm", "0") == "1"
+            text_contains = _param(q, "q") or None
 
-            bundle = load_bundle(root, label, "lastfile" if mode=="lastfile" else "hours", hours)
+            bundle = load_bundle(root, label, mode, hours)
             my_node_id = my_override or bundle.my_node_id
             resp = build_messages(bundle, include_encrypted, apps, my_node_id, from_id, to_id, dm_only, text_contains, limit)
-            resp["from_ids"] = sorted({m.get("from_id") for m in bundle.messages if m.get("from_id")})
-            resp["to_ids"]   = sorted({m.get("to_id") for m in bundle.messages if m.get("to_id")})
-            resp["apps_available"] = sorted(list(bundle.app_set))
+            resp["from_ids"] = bundle.from_ids
+            resp["to_ids"]   = bundle.to_ids
+            resp["apps_available"] = bundle.apps_sorted
             resp["my_node_id"] = my_node_id
-            return self._send_json(resp)
+            if _param(q, "format") == "ndjson":
+                rows = resp.pop("messages")
+                return self._stream_ndjson(resp, rows, cache=API_CACHE_CONTROL)
+            if len(resp["messages"]) > STREAM_JSON_MIN_ROWS:
+                return self._stream_json(resp, "messages", cache=API_CACHE_CONTROL)
+            return self._send_json(resp, cache=API_CACHE_CONTROL)
 
         self.send_response(404)
         self.end_headers()
@@ -524,7 +805,10 @@ INDEX_HTML = r"""<!doctype html>
 <meta name="viewport" content="width=device-width,initial-scale=1"/>
 <link rel="preconnect" href="https://cdn.jsdelivr.net"/>
 <link rel="preconnect" href="https://cdn.jsdelivr.net" crossorigin/>
-<link rel="stylesheet" href="https://unpkg.com/leaflet@1.9.4/dist/leaflet.css" crossorigin=""/>
+<link rel="preconnect" href="https://unpkg.com" crossorigin/>
+<link rel="preload" as="script" href="https://cdn.jsdelivr.net/npm/chart.js@4.4.4/dist/chart.umd.min.js"/>
+<link rel="preload" as="script" href="https://unpkg.com/leaflet@1.9.4/dist/leaflet.js" crossorigin=""/>
+<link rel="preload" as="style" href="https://unpkg.com/leaflet@1.9.4/dist/leaflet.css" crossorigin=""/>
 <style>
 :root { --bg:#0b1320; --panel:#111827; --muted:#6b7280; --text:#e5e7eb; --accent:#60a5fa; }
 * { box-sizing:border-box; }
@@ -554,9 +838,11 @@ th.sort-desc::after{ content:" ▼"; }
 .tabbar button.active{ background:var(--accent); color:#0b1320; }
 .badge{ background:#0f172a; padding:2px 6px; border-radius:6px; margin:0 4px; font-size:12px; color:#a5b4fc;}
 #map_node{ height:320px; border-radius:10px; }
+.vscroll{ max-height: calc(100vh - 220px); overflow:auto; }
+.vscroll thead th{ position:sticky; top:0; background:var(--panel); z-index:1; }
+.vscroll tr.node-row td{ white-space:nowrap; }
+.vscroll tr.vspacer td{ padding:0; border:0; }
 </style>
-<script src="https://cdn.jsdelivr.net/npm/chart.js@4.4.4/dist/chart.umd.min.js"></script>
-<script src="https://unpkg.com/leaflet@1.9.4/dist/leaflet.js" crossorigin=""></script>
 </head>
 <body>
 <header>
@@ -613,19 +899,44 @@ th.sort-desc::after{ content:" ▼"; }
 const qs = (s)=>document.querySelector(s);
 const qsa = (s)=>Array.from(document.querySelectorAll(s));
 const c2f = (c)=> (c==null? null : (c*9/5)+32);
-const toLocal = (iso)=>{ try{ return new Date(iso).toLocaleString(); }catch(e){ return iso||""; } };
-
-qsa(".tabbar button").forEach(btn=>{
-  btn.onclick=()=>{
-    qsa(".tabbar button").forEach(b=>b.classList.remove("active"));
-    btn.classList.add("active");
-    const tab = btn.dataset.tab;
-    ["overview","node","messages"].forEach(t=>{
-      qs("#view-"+t).style.display = (t===tab)?"block":"none";
-    });
-    if (tab==="overview") loadOverview();
-    if (tab==="messages") loadMessages();
+
+// However often a render is requested before the next frame, it runs once,
+// outside the input/network event that asked for it.
+function rafCoalesce(fn){
+  let pending = false;
+  return ()=>{
+    if (pending) return;
+    pending = true;
+    requestAnimationFrame(()=>{ pending = false; fn(); });
   };
+}
+const scheduleOverviewRows = rafCoalesce(()=>refreshOverviewRows());
+const scheduleOverviewWindow = rafCoalesce(()=>renderOverviewWindow());
+const scheduleMsgs = rafCoalesce(()=>renderMsgs());
+const _toLocalImpl = (iso)=>{ try{ return new Date(iso).toLocaleString(); }catch(e){ return iso||""; } };
+// Date parsing + locale formatting dominates row rendering, and the same
+// timestamps come back on every sort/re-render; cleared on each refetch.
+const _tlCache = new Map();
+function toLocal(ts){
+  let v = _tlCache.get(ts);
+  if (v !== undefined) return v;
+  v = _toLocalImpl(ts);
+  if (_tlCache.size > 5000) _tlCache.clear();
+  _tlCache.set(ts, v);
+  return v;
+}
+
+qs(".tabbar").addEventListener("click", (e)=>{
+  const btn = e.target.closest("button[data-tab]");
+  if (!btn) return;
+  qsa(".tabbar button").forEach(b=>b.classList.remove("active"));
+  btn.classList.add("active");
+  const tab = btn.dataset.tab;
+  ["overview","node","messages"].forEach(t=>{
+    qs("#view-"+t).style.display = (t===tab)?"block":"none";
+  });
+  if (tab==="overview") loadOverview();
+  if (tab==="messages") loadMessages();
 });
 
 async function loadLabels() {
@@ -640,9 +951,14 @@ async function loadLabels() {
     sel.appendChild(o);
   });
   if (j.default) sel.value = j.default;
+  invalidateUiParams();
 }
 
-function uiParams(extra={}) {
+// The sidebar is read once and the resulting query string reused by every
+// fetch until a sidebar control changes (or labels are reloaded).
+let _uiBase = null;
+function uiBase() {
+  if (_uiBase !== null) return _uiBase;
   const p = new URLSearchParams();
   p.set("root", qs("#root").value);
   p.set("label", qs("#label").value);
@@ -651,14 +967,46 @@ function uiParams(extra={}) {
   p.set("enc", qs("#enc").checked ? "1":"0");
   const apps = (qs("#apps").value||"").split(",").map(s=>s.trim()).filter(Boolean);
   if (apps.length) p.set("apps", apps.join(","));
-  for (const [k,v] of Object.entries(extra)) p.set(k, v);
+  return (_uiBase = p.toString());
+}
+const invalidateUiParams = ()=>{ _uiBase = null; };
+qs(".sidebar").addEventListener("input", invalidateUiParams);
+qs(".sidebar").addEventListener("change", invalidateUiParams);
+
+function uiParams(extra={}) {
+  const base = uiBase();
+  const keys = Object.keys(extra);
+  if (!keys.length) return base;
+  const p = new URLSearchParams(base);
+  for (const k of keys) p.set(k, extra[k]);
   return p.toString();
 }
 
 function fmt(v) { return (v===null || v===undefined || v==="") ? "—" : v; }
 function fmtNum(v, d=2) { return (v===null || v===undefined) ? "—" : Number(v).toFixed(d); }
 
-let overviewState = { sortKey:"last_heard", sortAsc:false, search:"" };
+// Overview rows are virtualized: only the rows intersecting the scroll
+// viewport (plus an overscan margin) are materialized; spacer rows above and
+// below stand in for the rest so the scrollbar still reflects the full list.
+const OV_ROW_H = 34;      // fallback; replaced by the measured row height
+const OV_OVERSCAN = 10;
+const OV_SEARCH_DEBOUNCE_MS = 120;
+let _searchT;
+
+let overviewState = { sortKey:"last_heard", sortAsc:false, search:"", j:null, rows:[], rowH:OV_ROW_H, activeTh:null };
+
+// Decorate-sort-undecorate: extract each row's key once, sort indices on the
+// keys, then project back. Returns a new array; `rows` is left untouched.
+function sortByKey(rows, get, asc){
+  const keys = rows.map(get);
+  const idx = rows.map((_,i)=>i);
+  const lt = asc? -1: 1;
+  idx.sort((a,b)=>{
+    const va = keys[a], vb = keys[b];
+    return va<vb? lt: va>vb? -lt: 0;
+  });
+  return idx.map(i=>rows[i]);
+}
 
 function sortRows(rows, key, asc){
   const val = (r)=>{
@@ -681,24 +1029,45 @@ function sortRows(rows, key, asc){
       default: return r.last_heard||"";
     }
   };
-  rows.sort((a,b)=>{
-    const va = val(a), vb = val(b);
-    if (va<vb) return asc? -1: 1;
-    if (va>vb) return asc? 1: -1;
-    return 0;
-  });
+  return sortByKey(rows, val, asc);
+}
+
+// Sort indicator: state.activeTh remembers the header that carries it, so a
+// sort touches only the previous and the new header instead of every th.
+function markSortedTh(state, selector, asc){
+  const th = qs(selector);
+  const prev = state.activeTh;
+  if (prev && prev !== th) prev.classList.remove("sort-asc","sort-desc");
+  if (th) {
+    th.classList.toggle("sort-asc", asc);
+    th.classList.toggle("sort-desc", !asc);
+  }
+  state.activeTh = th;
 }
 
+// `needle` is already lowercased; each node carries a lowercased copy of its
+// searchable fields (set once per fetch in renderOverviewTable). The "\n"
+// separator keeps a match from spanning two fields.
 function passesSearch(r, needle){
   if (!needle) return true;
-  const s = needle.toLowerCase();
-  return (r.name?.toLowerCase().includes(s)) || (r.node_id?.toLowerCase().includes(s));
+  return r._search.includes(needle);
+}
+
+function openNode(node_id){
+  qsa(".tabbar button").forEach(b=>b.classList.remove("active"));
+  qsa('.tabbar button[data-tab="node"]')[0].classList.add("active");
+  ["overview","node","messages"].forEach(t=>{
+    qs("#view-"+t).style.display = (t==="node")?"block":"none";
+  });
+  loadNode(node_id);
 }
 
 function renderOverviewTable(j){
   const el = qs("#view-overview");
   const appsList = (j.apps_available||[]).join(", ")||"—";
   qs("#fileinfo").textContent = `Loaded ${j.files_loaded?.length||0} file(s). Apps: ${appsList}`;
+  overviewState.j = j;
+  for (const n of (j.nodes||[])) n._search = ((n.name||"")+"\n"+(n.node_id||"")).toLowerCase();
 
   let html = `
   <div class="row" style="align-items:flex-end;">
@@ -711,7 +1080,7 @@ function renderOverviewTable(j){
     </div>
   </div>`;
 
-  html += `<table><thead><tr>
+  html += `<div id="ovscroll" class="vscroll"><table><thead><tr>
     <th data-k="name">Name</th>
     <th data-k="node_id">Node ID</th>
     <th data-k="first_heard">First Heard</th>
@@ -727,82 +1096,111 @@ function renderOverviewTable(j){
     <th data-k="tempF">Temp °F</th>
     <th data-k="humid">Humidity %</th>
     <th data-k="iaq">IAQ</th>
-  </tr></thead><tbody id="ovbody">`;
-
-  let rows = (j.nodes||[]).filter(r=>passesSearch(r, overviewState.search));
-  sortRows(rows, overviewState.sortKey, overviewState.sortAsc);
-
-  for (const n of rows) {
-    const ac = n.app_counts||{};
-    const dev = n.device||{};
-    const env = n.environment||{};
-    const tempF = (env.temperature!=null)? (c2f(env.temperature)) : null;
-
-    html += `<tr class="node-row" data-node="${n.node_id}">
-      <td>${fmt(n.name)}</td>
-      <td><code>${fmt(n.node_id)}</code></td>
-      <td>${n.first_heard? toLocal(n.first_heard): "—"}</td>
-      <td>${n.last_heard? toLocal(n.last_heard): "—"}</td>
-      <td>${fmt(n.total_msgs)}</td>
-      <td>${fmtNum(n.median_rssi,0)}</td>
-      <td>${fmtNum(n.median_snr,2)}</td>
-      <td>${fmt(ac["TEXT_MESSAGE_APP"]||0)}</td>
-      <td>${fmt(ac["TELEMETRY_APP"]||0)}</td>
-      <td>${fmt(ac["POSITION_APP"]||0)}</td>
-      <td>${fmt(dev.batteryLevel)}</td>
-      <td>${fmt(dev.voltage)}</td>
-      <td>${fmtNum(tempF,1)}</td>
-      <td>${fmt(env.relativeHumidity)}</td>
-      <td>${fmt(env.iaq)}</td>
-    </tr>`;
-  }
-  html += `</tbody></table>
+  </tr></thead><tbody id="ovbody"></tbody></table></div>
   <div class="note">Counts reflect packets this machine observed in the selected window.</div>`;
 
   el.innerHTML = html;
 
-  // sort indicators
-  qsa("#view-overview th").forEach(th=>{
-    th.classList.remove("sort-asc","sort-desc");
-    if (th.dataset.k === overviewState.sortKey) {
-      th.classList.add(overviewState.sortAsc? "sort-asc":"sort-desc");
+  // header sorting (one delegated listener on the thead)
+  qs("#view-overview thead").addEventListener("click", (e)=>{
+    const th = e.target.closest("th[data-k]");
+    if (!th) return;
+    const k = th.dataset.k;
+    if (overviewState.sortKey === k) {
+      overviewState.sortAsc = !overviewState.sortAsc;
+    } else {
+      overviewState.sortKey = k;
+      overviewState.sortAsc = (k==="name" || k==="node_id" || k==="first_heard") ? true : false;
     }
+    scheduleOverviewRows();
   });
 
-  // header sorting
-  qsa("#view-overview th").forEach(th=>{
-    th.onclick = ()=>{
-      const k = th.dataset.k;
-      if (!k) return;
-      if (overviewState.sortKey === k) {
-        overviewState.sortAsc = !overviewState.sortAsc;
-      } else {
-        overviewState.sortKey = k;
-        overviewState.sortAsc = (k==="name" || k==="node_id" || k==="first_heard") ? true : false;
-      }
-      renderOverviewTable(j);
-    };
+  // drilldown (one delegated listener; rows come and go as the window moves)
+  qs("#ovbody").addEventListener("click", (e)=>{
+    const tr = e.target.closest("tr.node-row");
+    if (tr) openNode(tr.dataset.node);
   });
 
-  // drilldown
-  qsa(".node-row").forEach(tr=>{
-    tr.onclick=()=>{
-      qsa(".tabbar button").forEach(b=>b.classList.remove("active"));
-      qsa('.tabbar button[data-tab="node"]')[0].classList.add("active");
-      ["overview","node","messages"].forEach(t=>{
-        qs("#view-"+t).style.display = (t==="node")?"block":"none";
-      });
-      loadNode(tr.dataset.node);
-    };
-  });
+  qs("#ovscroll").addEventListener("scroll", scheduleOverviewWindow);
 
+  // debounced: a burst of keystrokes costs one filter + window render
   qs("#ovsearch").oninput = (e)=>{
-    overviewState.search = e.target.value || "";
-    renderOverviewTable(j);
+    const v = e.target.value || "";
+    clearTimeout(_searchT);
+    if (v === overviewState.search) return;
+    _searchT = setTimeout(()=>{
+      overviewState.search = v;
+      qs("#ovscroll").scrollTop = 0;
+      scheduleOverviewRows();
+    }, OV_SEARCH_DEBOUNCE_MS);
   };
+
+  refreshOverviewRows();
+}
+
+// Filter + sort the full node list, then re-render the visible window.
+// One expression per overview cell, in column order; `n` is the node and
+// ac/dev/env/tempF are precomputed per row. They are compiled once into a
+// single straight-line row renderer instead of evaluating a template per row.
+const OV_CELLS = [
+  'fmt(n.name)',
+  '"<code>"+fmt(n.node_id)+"</code>"',
+  'n.first_heard? toLocal(n.first_heard): "—"',
+  'n.last_heard? toLocal(n.last_heard): "—"',
+  'fmt(n.total_msgs)',
+  'fmtNum(n.median_rssi,0)',
+  'fmtNum(n.median_snr,2)',
+  'fmt(ac["TEXT_MESSAGE_APP"]||0)',
+  'fmt(ac["TELEMETRY_APP"]||0)',
+  'fmt(ac["POSITION_APP"]||0)',
+  'fmt(dev.batteryLevel)',
+  'fmt(dev.voltage)',
+  'fmtNum(tempF,1)',
+  'fmt(env.relativeHumidity)',
+  'fmt(env.iaq)',
+];
+const renderOverviewRow = new Function('n', 'fmt', 'fmtNum', 'c2f', 'toLocal',
+  'const ac = n.app_counts||{}, dev = n.device||{}, env = n.environment||{};\n' +
+  'const tempF = (env.temperature!=null)? c2f(env.temperature): null;\n' +
+  'return \'<tr class="node-row" data-node="\'+n.node_id+\'">\'' +
+  OV_CELLS.map(e=>'+"<td>"+('+e+')+"</td>"').join('') + '+"</tr>";');
+
+function refreshOverviewRows(){
+  const needle = overviewState.search.toLowerCase();
+  const rows = (overviewState.j?.nodes||[]).filter(r=>passesSearch(r, needle));
+  overviewState.rows = sortRows(rows, overviewState.sortKey, overviewState.sortAsc);
+
+  markSortedTh(overviewState, `#view-overview th[data-k="${overviewState.sortKey}"]`, overviewState.sortAsc);
+
+  renderOverviewWindow();
+}
+
+function renderOverviewWindow(){
+  const sc = qs("#ovscroll"), body = qs("#ovbody");
+  if (!sc || !body) return;
+  const rows = overviewState.rows;
+  const rowH = overviewState.rowH;
+  const visible = Math.ceil(Math.max(sc.clientHeight, window.innerHeight)/rowH);
+  const top = Math.min(Math.floor(sc.scrollTop/rowH), Math.max(0, rows.length - visible));
+  const start = Math.max(0, top - OV_OVERSCAN);
+  const end = Math.min(rows.length, top + visible + OV_OVERSCAN);
+
+  const parts = [`<tr class="vspacer"><td colspan="15" style="height:${start*rowH}px"></td></tr>`];
+  for (let i=start; i<end; i++) parts.push(renderOverviewRow(rows[i], fmt, fmtNum, c2f, toLocal));
+  parts.push(`<tr class="vspacer"><td colspan="15" style="height:${(rows.length-end)*rowH}px"></td></tr>`);
+  body.innerHTML = parts.join("");
+
+  // Fixed-height rows keep the window math exact; take the real height from
+  // the first rendered row once and redo the window if the guess was off.
+  const first = body.rows[1];
+  if (first && first.classList.contains("node-row")) {
+    const h = first.getBoundingClientRect().height;
+    if (h && Math.abs(h - rowH) > 0.5) { overviewState.rowH = h; renderOverviewWindow(); }
+  }
 }
 
 async function loadOverview() {
+  _tlCache.clear();
   const r = await fetch(`/api/overview?`+uiParams());
   const j = await r.json();
   if (j.error) {
@@ -816,29 +1214,263 @@ let charts = {};
 function destroyChart(id){ if (charts[id]){ charts[id].destroy(); delete charts[id]; } }
 let maps = {};
 
-function lineChart(id, datasets, labels){
+// -------- Downsampling ----------
+// Charts never need more points than the canvas has device pixels, so series
+// are reduced before they reach Chart.js. A series is a pair of typed arrays,
+// xs (epoch ms, ascending) and ys; reducers return the indices to keep, or
+// null when the series is already small enough.
+
+// Largest-Triangle-Three-Buckets: keeps the visually significant points.
+function lttb(xs, ys, threshold){
+  const n = xs.length;
+  if (threshold >= n || threshold < 3) return null;
+  const out = new Int32Array(threshold);
+  const every = (n - 2) / (threshold - 2);
+  let a = 0, o = 1;
+  for (let i=0; i<threshold-2; i++){
+    // average of the next bucket is the third triangle vertex
+    const avgStart = Math.floor((i+1)*every) + 1;
+    const avgEnd = Math.min(Math.floor((i+2)*every) + 1, n);
+    let avgX = 0, avgY = 0;
+    for (let j=avgStart; j<avgEnd; j++){ avgX += xs[j]; avgY += ys[j]; }
+    const cnt = avgEnd - avgStart;
+    avgX /= cnt; avgY /= cnt;
+
+    const start = Math.floor(i*every) + 1;
+    const end = Math.floor((i+1)*every) + 1;
+    const ax = xs[a], ay = ys[a];
+    let maxArea = -1, pick = start;
+    for (let j=start; j<end; j++){
+      const area = Math.abs((ax - avgX)*(ys[j] - ay) - (ax - xs[j])*(avgY - ay));
+      if (area > maxArea){ maxArea = area; pick = j; }
+    }
+    out[o++] = pick;
+    a = pick;
+  }
+  out[o] = n - 1;
+  return out;
+}
+
+// Min/max per bucket: cheaper than LTTB and keeps every spike, which suits
+// noisy per-packet series such as RSSI/SNR.
+function minmax(xs, ys, buckets){
+  const n = xs.length;
+  if (buckets*2 >= n || buckets < 1) return null;
+  const out = [];
+  const size = n / buckets;
+  for (let b=0; b<buckets; b++){
+    const start = Math.floor(b*size), end = Math.min(Math.floor((b+1)*size), n);
+    let lo = start, hi = start;
+    for (let j=start+1; j<end; j++){
+      if (ys[j] < ys[lo]) lo = j;
+      if (ys[j] > ys[hi]) hi = j;
+    }
+    if (lo < hi) { out.push(lo, hi); }
+    else if (hi < lo) { out.push(hi, lo); }
+    else out.push(lo);
+  }
+  return out;
+}
+
+const TYPED = { f64: Float64Array, f32: Float32Array, i32: Int32Array };
+
+// Decode a server column table ({cols, dtypes}, requested with layout=cols)
+// into typed arrays; nulls become NaN (i32 columns never have gaps).
+function decodeCols(tbl){
+  const out = { n: (tbl?.cols?.ts||[]).length };
+  for (const [k, col] of Object.entries(tbl?.cols||{})) {
+    const T = TYPED[tbl.dtypes?.[k]] || Float64Array;
+    const arr = new T(col.length);
+    for (let i=0; i<col.length; i++) { const v = col[i]; arr[i] = (v == null)? NaN: v; }
+    out[k] = arr;
+  }
+  return out;
+}
+
+// One pass over a decoded table: for every listed field, compact the rows
+// that have both a timestamp and a value into {xs, ys} typed arrays
+// (optionally converting the value).
+function seriesByField(t, fields, conv={}){
+  const n = t.n, ts = t.ts;
+  const out = {}, src = [], fill = [];
+  for (const f of fields){
+    const col = t[f];
+    src.push(col);
+    fill.push(0);
+    out[f] = { xs: new Float64Array(col? n: 0), ys: new ((col && !conv[f])? col.constructor: Float32Array)(col? n: 0) };
+  }
+  for (let i=0; i<n; i++){
+    const x = ts[i];
+    if (x !== x) continue;   // NaN: no timestamp
+    for (let k=0; k<fields.length; k++){
+      const col = src[k];
+      if (!col) continue;
+      const v = col[i];
+      if (v !== v) continue;
+      const f = fields[k], s = out[f], j = fill[k]++;
+      s.xs[j] = x;
+      s.ys[j] = conv[f]? conv[f](v): v;
+    }
+  }
+  fields.forEach((f, k)=>{ out[f].xs = out[f].xs.subarray(0, fill[k]); out[f].ys = out[f].ys.subarray(0, fill[k]); });
+  return out;
+}
+
+// Reduce one series with `algo` ("lttb" or "minmax") and gather the kept
+// points into new compact arrays (the input itself when nothing was cut).
+function reduceSeries(xs, ys, target, algo){
+  const idx = (algo === "minmax"? minmax: lttb)(xs, ys, target);
+  if (!idx) return {xs, ys};
+  const rx = new Float64Array(idx.length), ry = new ys.constructor(idx.length);
+  for (let i=0; i<idx.length; i++){ rx[i] = xs[idx[i]]; ry[i] = ys[idx[i]]; }
+  return {xs:rx, ys:ry};
+}
+
+// Downsampling runs in a worker built from the functions above, so a large
+// node does not block scrolling/typing; buffers are transferred both ways,
+// not copied. Falls back to the main thread where workers are unavailable.
+const DS_WORKER_MAIN = `
+onmessage = (e)=>{
+  const out = [], transfer = [];
+  for (const j of e.data.jobs){
+    const xs = new Float64Array(j.xs, 0, j.n), ys = new self[j.yType](j.ys, 0, j.n);
+    const r = reduceSeries(xs, ys, j.target, j.algo);
+    out.push({xs:r.xs.buffer, ys:r.ys.buffer, n:r.xs.length, yType:j.yType});
+    transfer.push(r.xs.buffer, r.ys.buffer);
+  }
+  postMessage({id:e.data.id, out}, transfer);
+};`;
+let _dsWorker = null, _dsSeq = 0;
+const _dsPending = new Map();
+
+function dsWorker(){
+  if (_dsWorker === null) {
+    try {
+      const src = [lttb, minmax, reduceSeries].map(f=>f.toString()).join("\n") + DS_WORKER_MAIN;
+      _dsWorker = new Worker(URL.createObjectURL(new Blob([src], {type:"text/javascript"})));
+      _dsWorker.onmessage = (e)=>{
+        const p = _dsPending.get(e.data.id);
+        _dsPending.delete(e.data.id);
+        if (p) p.resolve(e.data.out.map(o=>({xs:new Float64Array(o.xs, 0, o.n), ys:new self[o.yType](o.ys, 0, o.n)})));
+      };
+      _dsWorker.onerror = (e)=>{
+        _dsWorker = false;   // main-thread reduction from now on
+        for (const p of _dsPending.values()) p.reject(e);
+        _dsPending.clear();
+      };
+    } catch (e) { _dsWorker = false; }
+  }
+  return _dsWorker || null;
+}
+
+// jobs: [{s:{xs, ys}, algo}] -> Promise of reduced {xs, ys}, in order.
+// Only compact copies go to the worker, so if it fails the call is redone here.
+function downsampleAll(jobs, target){
+  const onMain = ()=> jobs.map(j=>reduceSeries(j.s.xs, j.s.ys, target, j.algo));
+  const w = dsWorker();
+  if (!w) return Promise.resolve(onMain());
+  const msg = [], transfer = [];
+  for (const j of jobs){
+    // compact copies: seriesByField's arrays are views into larger buffers
+    const xs = j.s.xs.slice(), ys = j.s.ys.slice();
+    msg.push({xs:xs.buffer, ys:ys.buffer, n:xs.length, yType:ys.constructor.name, target, algo:j.algo});
+    transfer.push(xs.buffer, ys.buffer);
+  }
+  const id = ++_dsSeq;
+  return new Promise((resolve, reject)=>{
+    _dsPending.set(id, {resolve, reject});
+    try { w.postMessage({id, jobs:msg}, transfer); }
+    catch (e) { _dsPending.delete(id); reject(e); }
+  }).catch((e)=>{
+    console.warn("downsample worker failed; reducing on the main thread", e);
+    return onMain();
+  });
+}
+
+// Chart.js {x, y} points from a reduced series.
+function toPoints(s){
+  const n = s.xs.length, pts = new Array(n);
+  for (let i=0; i<n; i++) pts[i] = {x:s.xs[i], y:s.ys[i]};
+  return pts;
+}
+
+// Chart.js and Leaflet are only needed once a node is opened, so they are
+// fetched on demand (the <head> preloads them) instead of blocking first paint.
+const CHART_JS_URL = "https://cdn.jsdelivr.net/npm/chart.js@4.4.4/dist/chart.umd.min.js";
+const LEAFLET_JS_URL = "https://unpkg.com/leaflet@1.9.4/dist/leaflet.js";
+const LEAFLET_CSS_URL = "https://unpkg.com/leaflet@1.9.4/dist/leaflet.css";
+const _libLoads = {};
+function loadScript(src, crossOrigin){
+  return _libLoads[src] ||= new Promise((resolve, reject)=>{
+    const el = document.createElement("script");
+    el.src = src;
+    el.async = true;
+    if (crossOrigin !== undefined) el.crossOrigin = crossOrigin;
+    el.onload = ()=> resolve();
+    el.onerror = ()=>{ delete _libLoads[src]; el.remove(); reject(new Error(`failed to load ${src}`)); };
+    document.head.appendChild(el);
+  });
+}
+function ensureChart(){
+  return window.Chart ? Promise.resolve() : loadScript(CHART_JS_URL);
+}
+function ensureLeaflet(){
+  if (!qs(`link[rel=stylesheet][href="${LEAFLET_CSS_URL}"]`)) {
+    const css = document.createElement("link");
+    css.rel = "stylesheet"; css.href = LEAFLET_CSS_URL; css.crossOrigin = "";
+    document.head.appendChild(css);
+  }
+  return window.L ? Promise.resolve() : loadScript(LEAFLET_JS_URL, "");
+}
+
+function lineChart(id, datasets, target){
+  const canvas = document.getElementById(id);
+  const ch = charts[id];
+  if (ch && ch.canvas === canvas) {
+    ch.data.datasets = datasets;
+    ch.options.plugins.decimation.samples = target;
+    ch.update('none');
+    return;
+  }
   destroyChart(id);
-  const ctx = document.getElementById(id).getContext('2d');
-  charts[id] = new Chart(ctx, {
+  charts[id] = new Chart(canvas.getContext('2d'), {
     type: 'line',
-    data: { labels, datasets },
+    data: { datasets },
     options: {
       responsive:true,
-      scales:{ x:{ ticks:{ color:'#cbd5e1'} }, y:{ ticks:{ color:'#cbd5e1' } } },
-      plugins:{ legend:{ labels:{ color:'#cbd5e1' } } }
+      animation:false,
+      parsing:false,
+      normalized:true,
+      scales:{
+        x:{ type:'linear', ticks:{ color:'#cbd5e1', callback:(v)=>toLocal(v) } },
+        y:{ ticks:{ color:'#cbd5e1' } }
+      },
+      plugins:{
+        legend:{ labels:{ color:'#cbd5e1' } },
+        tooltip:{ callbacks:{ title:(items)=>items.length? toLocal(items[0].parsed.x): "" } },
+        decimation:{ enabled:true, algorithm:'lttb', samples:target }
+      }
     }
   });
 }
 
 function initMap(id, points){
-  if (maps[id]) { maps[id].remove(); delete maps[id]; }
-  const m = L.map(id);
-  L.tileLayer('https://{s}.tile.openstreetmap.org/{z}/{x}/{y}.png', {
-    maxZoom: 19, attribution: '&copy; OpenStreetMap'
-  }).addTo(m);
+  let m = maps[id];
+  if (m && m.getContainer() === document.getElementById(id)) {
+    // keep the map and its tile layer; drop only the previous track
+    m.eachLayer(l=>{ if (!(l instanceof L.TileLayer)) m.removeLayer(l); });
+    m.invalidateSize();
+  } else {
+    if (m) { m.remove(); delete maps[id]; }
+    m = L.map(id);
+    L.tileLayer('https://{s}.tile.openstreetmap.org/{z}/{x}/{y}.png', {
+      maxZoom: 19, attribution: '&copy; OpenStreetMap'
+    }).addTo(m);
+    maps[id] = m;
+  }
   const latlngs = points.map(p=>[p.lat, p.lon]);
   if (latlngs.length===1){
-    const marker = L.marker(latlngs[0]).addTo(m);
+    L.marker(latlngs[0]).addTo(m);
     m.setView(latlngs[0], 14);
   } else {
     L.polyline(latlngs, {color:'#60a5fa'}).addTo(m);
@@ -846,28 +1478,25 @@ function initMap(id, points){
     const b = L.latLngBounds(latlngs);
     m.fitBounds(b, {padding:[20,20]});
   }
-  maps[id] = m;
 }
 
-async function loadNode(node_id) {
-  const r = await fetch(`/api/node?`+uiParams({node_id}));
-  const j = await r.json();
-  const el = qs("#view-node");
-  if (j.error) { el.innerHTML = `<div class="note">${j.error}</div>`; return; }
-
-  let html = `<h2>Node Detail</h2>
+// The node view is built once and then only filled in, so the canvases and
+// the map container survive and their Chart/Leaflet instances can be reused.
+function ensureNodeView(el){
+  if (qs("#chart_radio")) return;
+  el.innerHTML = `<h2>Node Detail</h2>
   <div class="row">
     <div class="card" style="flex:1">
-      <div class="kpi">${j.name}</div>
-      <div><code>${j.node_id}</code></div>
+      <div class="kpi" id="nd_name"></div>
+      <div><code id="nd_id"></code></div>
     </div>
     <div class="card" style="flex:1">
-      <div>First Heard: <b>${j.first_heard? toLocal(j.first_heard): "—"}</b></div>
-      <div>Last Heard: <b>${j.last_heard? toLocal(j.last_heard): "—"}</b></div>
+      <div>First Heard: <b id="nd_first"></b></div>
+      <div>Last Heard: <b id="nd_last"></b></div>
     </div>
     <div class="card" style="flex:1">
-      <div>Total Messages: <b>${fmt(j.total_msgs)}</b></div>
-      <div>Median RSSI/SNR: <b>${fmtNum(j.median_rssi,0)} dBm / ${fmtNum(j.median_snr,2)} dB</b></div>
+      <div>Total Messages: <b id="nd_total"></b></div>
+      <div>Median RSSI/SNR: <b id="nd_radio"></b></div>
     </div>
   </div>
 
@@ -882,60 +1511,96 @@ async function loadNode(node_id) {
   <div class="row">
     <div class="card" style="flex:1"><canvas id="chart_dev2" height="140"></canvas></div>
     <div class="card" style="flex:1"><canvas id="chart_env2" height="140"></canvas></div>
+  </div>
+  <div id="nd_gps" style="display:none;">
+    <h3>GPS Track</h3>
+    <div id="map_node" class="card"></div>
   </div>`;
+}
+
+let nodeLoadSeq = 0;
+
+async function loadNode(node_id) {
+  const seq = ++nodeLoadSeq;
+  const el = qs("#view-node");
+  // charts are as wide as the panel; let the server M4-reduce to that
+  const w = Math.round(el.clientWidth * (window.devicePixelRatio||1)) || 1000;
+  const chartLib = ensureChart();   // download alongside the data request
+  chartLib.catch(()=>{});           // reported below, if this load still gets that far
+  const r = await fetch(`/api/node?`+uiParams({node_id, agg:"m4", w, layout:"cols"}));
+  const j = await r.json();
+  if (seq !== nodeLoadSeq) return;   // a newer loadNode has taken over
+  if (j.error) { el.innerHTML = `<div class="note">${j.error}</div>`; return; }
+
+  ensureNodeView(el);
+  qs("#nd_name").textContent = j.name;
+  qs("#nd_id").textContent = j.node_id;
+  qs("#nd_first").textContent = j.first_heard? toLocal(j.first_heard): "—";
+  qs("#nd_last").textContent = j.last_heard? toLocal(j.last_heard): "—";
+  qs("#nd_total").textContent = fmt(j.total_msgs);
+  qs("#nd_radio").textContent = `${fmtNum(j.median_rssi,0)} dBm / ${fmtNum(j.median_snr,2)} dB`;
 
   // If GPS positions exist, show map under telemetry
   const pos = (j.positions||[]);
-  if (pos.length>0){
-    html += `
-    <h3>GPS Track</h3>
-    <div id="map_node" class="card"></div>`;
+  qs("#nd_gps").style.display = pos.length>0? "block": "none";
+
+  const dev = decodeCols(j.telemetry_device);
+  const env = decodeCols(j.telemetry_env);
+  const rq  = decodeCols(j.radio_quality);
+  const target = Math.max(500, Math.round(qs("#chart_radio").clientWidth * (window.devicePixelRatio||1)));
+
+  const rqS  = seriesByField(rq, ["rxRssi","rxSnr"]);
+  const devS = seriesByField(dev, ["voltage","batteryLevel","channelUtilization","airUtilTx"]);
+  const envS = seriesByField(env, ["temperature","relativeHumidity","barometricPressure","iaq"], {temperature:c2f});
+
+  const plan = [
+    // Radio chart (local time)
+    ["chart_radio", "minmax", [["RSSI (dBm)", rqS.rxRssi, "#22d3ee"], ["SNR (dB)", rqS.rxSnr, "#eab308"]]],
+    // Telemetry (°F for temp, local time axis)
+    ["chart_dev1", "lttb", [["Voltage (V)", devS.voltage, "#60a5fa"], ["Battery %", devS.batteryLevel, "#10b981"]]],
+    ["chart_env1", "lttb", [["Temp °F", envS.temperature, "#f59e0b"], ["Humidity %", envS.relativeHumidity, "#34d399"]]],
+    ["chart_dev2", "lttb", [["Channel Util", devS.channelUtilization, "#a78bfa"], ["AirUtilTx", devS.airUtilTx, "#f472b6"]]],
+    ["chart_env2", "lttb", [["Pressure hPa", envS.barometricPressure, "#93c5fd"], ["IAQ", envS.iaq, "#fb7185"]]],
+  ];
+  const reduced = await downsampleAll(plan.flatMap(([, algo, sets])=>sets.map(([, s])=>({s, algo}))), target);
+  try { await chartLib; }
+  catch (e) { el.insertAdjacentHTML("afterbegin", `<div class="note">${e.message}</div>`); return; }
+  if (seq !== nodeLoadSeq) return;   // a newer loadNode has taken over
+  let k = 0;
+  for (const [id, , sets] of plan) {
+    lineChart(id, sets.map(([label, , borderColor])=>({label, data: toPoints(reduced[k++]), borderColor})), target);
   }
-  el.innerHTML = html;
-
-  const dev = j.telemetry_device||[];
-  const env = j.telemetry_env||[];
-  const rq  = j.radio_quality||[];
-  const ts_dev = dev.map(d=> d.ts? toLocal(d.ts): "");
-  const ts_env = env.map(d=> d.ts? toLocal(d.ts): "");
-  const ts_rq  = rq.map(d=> d.ts? toLocal(d.ts): "");
-
-  // Radio chart (local time)
-  lineChart("chart_radio", [
-    {label:"RSSI (dBm)", data: rq.map(d=>d.rxRssi??null), borderColor:"#22d3ee"},
-    {label:"SNR (dB)", data: rq.map(d=>d.rxSnr??null), borderColor:"#eab308"}
-  ], ts_rq);
-
-  // Telemetry (°F for temp, local time labels)
-  lineChart("chart_dev1", [
-    {label:"Voltage (V)", data: dev.map(d=>d.voltage??null), borderColor:"#60a5fa"},
-    {label:"Battery %", data: dev.map(d=>d.batteryLevel??null), borderColor:"#10b981"}
-  ], ts_dev);
-
-  lineChart("chart_env1", [
-    {label:"Temp °F", data: env.map(d=> d.temperature!=null? c2f(d.temperature): null), borderColor:"#f59e0b"},
-    {label:"Humidity %", data: env.map(d=>d.relativeHumidity??null), borderColor:"#34d399"}
-  ], ts_env);
-
-  lineChart("chart_dev2", [
-    {label:"Channel Util", data: dev.map(d=>d.channelUtilization??null), borderColor:"#a78bfa"},
-    {label:"AirUtilTx", data: dev.map(d=>d.airUtilTx??null), borderColor:"#f472b6"}
-  ], ts_dev);
-
-  lineChart("chart_env2", [
-    {label:"Pressure hPa", data: env.map(d=>d.barometricPressure??null), borderColor:"#93c5fd"},
-    {label:"IAQ", data: env.map(d=>d.iaq??null), borderColor:"#fb7185"}
-  ], ts_env);
 
   // Map
   if (pos.length>0){
     // slight delay to ensure #map_node has layout
-    setTimeout(()=> initMap("map_node", pos), 50);
+    const mapLib = ensureLeaflet().then(()=>true, (e)=>{ console.warn(e.message); return false; });
+    setTimeout(()=> mapLib.then((ok)=>{ if (ok && seq === nodeLoadSeq) initMap("map_node", pos); }), 50);
   }
 }
 
 // -------- Messages (sortable) ----------
-let messagesState = { rows:[], sortKey:"ts", sortAsc:false, lastQuery:null };
+let messagesState = { rows:[], sortKey:"ts", sortAsc:false, lastQuery:null, activeTh:null };
+
+// Rows are cloned from these templates and filled via textContent: no HTML
+// parsing per row, and message text is never interpreted as markup.
+const MSG_ROW = document.createElement("tr");
+for (let i=0; i<12; i++) MSG_ROW.appendChild(document.createElement("td"));
+const MSG_BADGE = document.createElement("span");
+MSG_BADGE.className = "badge";
+const MSG_CODE = document.createElement("code");
+
+function fillWho(td, name, id){
+  if (name) {
+    const b = MSG_BADGE.cloneNode(false);
+    b.textContent = id;
+    td.append(name+" ", b);
+  } else {
+    const code = MSG_CODE.cloneNode(false);
+    code.textContent = id||"";
+    td.appendChild(code);
+  }
+}
 
 function sortMessages(rows, key, asc){
   const get = (r)=>{
@@ -955,129 +1620,160 @@ function sortMessages(rows, key, asc){
       default: return r.ts || "";
     }
   };
-  rows.sort((a,b)=>{
-    const va=get(a), vb=get(b);
-    if (va<vb) return asc? -1: 1;
-    if (va>vb) return asc? 1: -1;
-    return 0;
-  });
+  return sortByKey(rows, get, asc);
 }
 
-async function loadMessages() {
-  const params = uiParams({limit:"1000"});
-  messagesState.lastQuery = params;
-  const r = await fetch(`/api/messages?`+params);
-  const j = await r.json();
-  const el = qs("#view-messages");
-  const fromOpts = (j.from_ids||[]).map(v=>`<option value="${v}">${v}</option>`).join("");
-  const toOpts   = (j.to_ids||[]).map(v=>`<option value="${v}">${v}</option>`).join("");
-  const apps = (j.apps_available||[]).join(",");
-
-  let html = `<div class="row">
-    <div style="flex:1"><label>From</label><select id="mf">${fromOpts?('<option value="">(any)</option>'+fromOpts):'<option value="">(any)</option>'}</select></div>
-    <div style="flex:1"><label>To</label><select id="mt">${toOpts?('<option value="">(any)</option>'+toOpts):'<option value="">(any)</option>'}</select></div>
-    <div style="flex:1"><label>Text contains</label><input id="mq" type="text"/></div>
-    <div style="flex:.6"><label>&nbsp;</label><div class="checkbox"><input id="mdm" type="checkbox"/> <span>DMs only</span></div></div>
-    <div style="flex:.5"><label>&nbsp;</label><button id="mapply">Apply</button></div>
-  </div>
-  <div class="note" style="margin:6px 0;">Apps available: ${apps || "—"}</div>
-  <table><thead><tr>
-    <th data-k="ts">Time (Local)</th>
-    <th data-k="from">From</th>
-    <th data-k="to">To</th>
-    <th data-k="app">App</th>
-    <th data-k="dm">DM</th>
-    <th data-k="chan">Chan</th>
-    <th data-k="text">Text</th>
-    <th data-k="rssi">RSSI</th>
-    <th data-k="snr">SNR</th>
-    <th data-k="hop">Hop</th>
-    <th data-k="relay">Relay</th>
-    <th data-k="id">ID</th>
-  </tr></thead><tbody id="mtbody"></tbody></table>
-  <div class="note">Showing up to 1000 most recent rows. Click headers to sort.</div>`;
-  el.innerHTML = html;
+function renderMsgs(){
+  const body = qs("#mtbody");
+  if (!body) return;
+  const rows = sortMessages(messagesState.rows, messagesState.sortKey, messagesState.sortAsc);
+  const frag = document.createDocumentFragment();
+  for (const m of rows) {
+    const tr = MSG_ROW.cloneNode(true);
+    const c = tr.children;
+    c[0].textContent = m.ts? toLocal(m.ts): "";
+    fillWho(c[1], m.from_name, m.from_id);
+    fillWho(c[2], m.to_name, m.to_id);
+    c[3].textContent = m.app||"";
+    c[4].textContent = m.is_dm? "✅":"";
+    c[5].textContent = m.channel??"";
+    c[6].textContent = m.text??"";
+    c[7].textContent = m.rxRssi??"";
+    c[8].textContent = m.rxSnr??"";
+    c[9].textContent = m.hopLimit??"";
+    c[10].textContent = m.relayNode??"";
+    c[11].textContent = m.id??"";
+    frag.appendChild(tr);
+  }
+  body.replaceChildren(frag);
 
-  messagesState.rows = (j.messages||[]);
-
-  function renderMsgs(){
-    const body = qs("#mtbody"); body.innerHTML = "";
-    const rows = messagesState.rows.slice();
-    sortMessages(rows, messagesState.sortKey, messagesState.sortAsc);
-    rows.forEach(m=>{
-      const tr = document.createElement("tr");
-      tr.innerHTML = `<td>${m.ts? toLocal(m.ts): ""}</td>
-      <td>${m.from_name? (m.from_name+" <span class='badge'>"+m.from_id+"</span>") : ("<code>"+(m.from_id||"")+"</code>")}</td>
-      <td>${m.to_name? (m.to_name+" <span class='badge'>"+m.to_id+"</span>") : ("<code>"+(m.to_id||"")+"</code>")}</td>
-      <td>${m.app||""}</td>
-      <td>${m.is_dm? "✅":""}</td>
-      <td>${m.channel??""}</td>
-      <td>${m.text??""}</td>
-      <td>${m.rxRssi??""}</td>
-      <td>${m.rxSnr??""}</td>
-      <td>${m.hopLimit??""}</td>
-      <td>${m.relayNode??""}</td>
-      <td>${m.id??""}</td>`;
-      body.appendChild(tr);
-    });
+  markSortedTh(messagesState, `#view-messages th[data-k="${messagesState.sortKey}"]`, messagesState.sortAsc);
+}
 
-    // header sort indicators
-    qsa("#view-messages th").forEach(th=>{
-      th.classList.remove("sort-asc","sort-desc");
-      if (th.dataset.k === messagesState.sortKey) {
-        th.classList.add(messagesState.sortAsc? "sort-asc":"sort-desc");
-      }
-    });
+const MSG_STREAM_BATCH = 200;   // rows received between intermediate renders
+
+// Fetch /api/messages as NDJSON: the first line is the header (filter lists,
+// apps), each following line one message. Rows are rendered in batches as they
+// arrive instead of after the whole payload has been received and parsed.
+async function streamMessages(params, onHead){
+  const rows = [];
+  messagesState.rows = rows;
+  const r = await fetch(`/api/messages?`+params+"&format=ndjson");
+  if (!r.ok) {   // errors come back as a plain JSON object
+    const j = await r.json();
+    if (onHead) onHead(j);
+    scheduleMsgs();
+    return;
   }
-  renderMsgs();
+  const reader = r.body.getReader();
+  const dec = new TextDecoder();
+  let buf = "", gotHead = false, pending = 0;
+  const take = (line)=>{
+    if (!line) return;
+    const o = JSON.parse(line);
+    if (!gotHead) { gotHead = true; if (onHead) onHead(o); return; }
+    rows.push(o);
+    if (++pending >= MSG_STREAM_BATCH) { pending = 0; scheduleMsgs(); }
+  };
+  for (;;) {
+    const {value, done} = await reader.read();
+    if (messagesState.rows !== rows) { reader.cancel(); return; }   // superseded by a newer fetch
+    if (done) break;
+    buf += dec.decode(value, {stream:true});
+    let i;
+    while ((i = buf.indexOf("\n")) >= 0) { take(buf.slice(0, i)); buf = buf.slice(i+1); }
+  }
+  take((buf + dec.decode()).trim());
+  scheduleMsgs();
+}
 
-  // clickable headers
-  qsa("#view-messages th").forEach(th=>{
-    th.onclick = ()=>{
-      const k = th.dataset.k; if (!k) return;
+async function loadMessages() {
+  _tlCache.clear();
+  const params = uiParams({limit:"1000"});
+  messagesState.lastQuery = params;
+  await streamMessages(params, (j)=>{
+    const el = qs("#view-messages");
+    const fromOpts = (j.from_ids||[]).map(v=>`<option value="${v}">${v}</option>`).join("");
+    const toOpts   = (j.to_ids||[]).map(v=>`<option value="${v}">${v}</option>`).join("");
+    const apps = (j.apps_available||[]).join(",");
+
+    let html = `<div class="row">
+      <div style="flex:1"><label>From</label><select id="mf">${fromOpts?('<option value="">(any)</option>'+fromOpts):'<option value="">(any)</option>'}</select></div>
+      <div style="flex:1"><label>To</label><select id="mt">${toOpts?('<option value="">(any)</option>'+toOpts):'<option value="">(any)</option>'}</select></div>
+      <div style="flex:1"><label>Text contains</label><input id="mq" type="text"/></div>
+      <div style="flex:.6"><label>&nbsp;</label><div class="checkbox"><input id="mdm" type="checkbox"/> <span>DMs only</span></div></div>
+      <div style="flex:.5"><label>&nbsp;</label><button id="mapply">Apply</button></div>
+    </div>
+    <div class="note" style="margin:6px 0;">Apps available: ${apps || "—"}</div>
+    <table><thead><tr>
+      <th data-k="ts">Time (Local)</th>
+      <th data-k="from">From</th>
+      <th data-k="to">To</th>
+      <th data-k="app">App</th>
+      <th data-k="dm">DM</th>
+      <th data-k="chan">Chan</th>
+      <th data-k="text">Text</th>
+      <th data-k="rssi">RSSI</th>
+      <th data-k="snr">SNR</th>
+      <th data-k="hop">Hop</th>
+      <th data-k="relay">Relay</th>
+      <th data-k="id">ID</th>
+    </tr></thead><tbody id="mtbody"></tbody></table>
+    <div class="note">Showing up to 1000 most recent rows. Click headers to sort.</div>`;
+    el.innerHTML = html;
+
+    // clickable headers (one delegated listener on the thead)
+    qs("#view-messages thead").addEventListener("click", (e)=>{
+      const th = e.target.closest("th[data-k]");
+      if (!th) return;
+      const k = th.dataset.k;
       if (messagesState.sortKey === k) {
         messagesState.sortAsc = !messagesState.sortAsc;
       } else {
         messagesState.sortKey = k;
         messagesState.sortAsc = (k==="from" || k==="to" || k==="app" || k==="text") ? true : false;
       }
-      renderMsgs();
-    };
-  });
+      scheduleMsgs();
+    });
 
-  // Filters
-  qs("#mapply").onclick = async ()=>{
-    const extra = {
-      from: qs("#mf").value||"",
-      to: qs("#mt").value||"",
-      dm: qs("#mdm").checked ? "1":"0",
-      q: qs("#mq").value||"",
-      limit: "1000"
+    // Filters
+    qs("#mapply").onclick = ()=>{
+      const extra = {
+        from: qs("#mf").value||"",
+        to: qs("#mt").value||"",
+        dm: qs("#mdm").checked ? "1":"0",
+        q: qs("#mq").value||"",
+        limit: "1000"
+      };
+      return streamMessages(uiParams(extra));
     };
-    const r2 = await fetch(`/api/messages?`+uiParams(extra));
-    const j2 = await r2.json();
-    messagesState.rows = (j2.messages||[]);
-    renderMsgs();
-  };
+  });
 }
 
-qs("#apply").onclick = ()=>{ loadOverview(); };
-qs("#refresh").onclick = ()=>{ loadOverview(); };
+qs("#apply").onclick = ()=>{ invalidateUiParams(); loadOverview(); };
+qs("#refresh").onclick = ()=>{ invalidateUiParams(); loadOverview(); };
 
 (async function init(){
-  await loadLabels();
-  loadOverview();
+  // independent: with no label yet, the server picks the same default
+  await Promise.all([loadLabels(), loadOverview()]);
 })();
 </script>
 </body>
 </html>
 """
 
+INDEX_HTML_BYTES = INDEX_HTML.encode("utf-8")
+INDEX_HTML_GZ = gzip.compress(INDEX_HTML_BYTES, compresslevel=9)
+_index_digest = hashlib.sha1(INDEX_HTML_BYTES).hexdigest()[:20]
+INDEX_ETAG = f'"{_index_digest}"'
+INDEX_ETAG_GZ = f'"{_index_digest}-gz"'   # distinct per encoding (Vary: Accept-Encoding)
+
 # -------------------------
 # Main
 # -------------------------
 def main():
-    httpd = HTTPServer((HOST, PORT), Handler)
+    # one thread per request: a slow multi-hour load no longer stalls other UI fetches
+    httpd = ThreadingHTTPServer((HOST, PORT), Handler)
     print(f"Meshtastic WebUI (Standalone v1.2) -> http://{HOST}:{PORT}")
     print(f"Logs root default: {DEFAULT_LOG_ROOT}")
     try: